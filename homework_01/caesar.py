@@ -1,37 +1,120 @@
-def encrypt_caesar(plaintext: str) -> str:
+import argparse
+import io
+import string
+import sys
+from functools import lru_cache
+from typing import Iterator, Optional, TextIO
+
+CHUNK_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=None)
+def caesar_table(shift: int) -> dict:
+    """
+    This function builds a translation table for a Caesar cipher.
+    Tables are cached, so every shift is computed only once.
+    :param shift: number of positions each latin letter is moved by (may be negative)
+    :return: table for str.translate
+    """
+    shift %= 26
+    lower = string.ascii_lowercase
+    upper = string.ascii_uppercase
+    return str.maketrans(lower + upper,
+                         lower[shift:] + lower[:shift] + upper[shift:] + upper[:shift])
+
+
+def encrypt_caesar(plaintext: str, shift: int = 3) -> str:
     """
     This function encrypts a message using a Caesar cipher.
     :param plaintext: word that must be encrypted
+    :param shift: number of positions each letter is moved by
     :return: encrypted word
     """
-
-    ciphertext = ""
-    for symb in plaintext:
-        if 'A' <= symb <= 'Z' or 'a' <= symb <= 'z':
-            symb_code = ord(symb) + 3
-            if ord('Z') < symb_code < ord('a') or symb_code > ord('z'):
-                symb_code -= 26
-            ciphertext += chr(symb_code)
-        else:
-            ciphertext += symb
-    return ciphertext
+    return plaintext.translate(caesar_table(shift))
 
 
-def decrypt_caesar(ciphertext: str) -> str:
+def decrypt_caesar(ciphertext: str, shift: int = 3) -> str:
     """
     This function decrypts an encrypted message using a Caesar cipher.
     :param ciphertext: word that must be decrypted
+    :param shift: number of positions each letter was moved by
     :return: decrypted word
     """
+    return ciphertext.translate(caesar_table(-shift))
+
+
+def read_chunks(reader: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """
+    This function reads a text stream piece by piece.
+    :param reader: stream to read from
+    :param chunk_size: maximal number of symbols in one piece
+    :return: generator of pieces
+    """
+    while True:
+        chunk = reader.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def open_text(filename: Optional[str], mode: str) -> TextIO:
+    """
+    This function opens a file (or stdin/stdout if no name is given) as UTF-8 text
+    without newline translation, so that the cipher sees every symbol as is.
+    :param filename: name of the file or None
+    :param mode: 'r' or 'w'
+    :return: text stream
+    """
+    if filename is not None:
+        return open(filename, mode, encoding='utf-8', newline='')
+    if mode == 'r':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+    return io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='', write_through=True)
+
+
+def encrypt_stream(reader: TextIO, writer: TextIO, shift: int = 3, chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    This function encrypts a stream using a Caesar cipher without loading it into memory.
+    :param reader: stream with the message
+    :param writer: stream for the encrypted message
+    :param shift: number of positions each letter is moved by
+    :param chunk_size: number of symbols processed at once
+    :return: number of processed symbols
+    >>> from io import StringIO
+    >>> writer = StringIO()
+    >>> encrypt_stream(StringIO('Python 3.6, xyz'), writer, chunk_size=4)
+    15
+    >>> writer.getvalue() == encrypt_caesar('Python 3.6, xyz')
+    True
+    """
+    table = caesar_table(shift)
+    total = 0
+    for chunk in read_chunks(reader, chunk_size):
+        writer.write(chunk.translate(table))
+        total += len(chunk)
+    return total
+
+
+def decrypt_stream(reader: TextIO, writer: TextIO, shift: int = 3, chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    This function decrypts a stream using a Caesar cipher without loading it into memory.
+    :param reader: stream with the encrypted message
+    :param writer: stream for the decrypted message
+    :param shift: number of positions each letter was moved by
+    :param chunk_size: number of symbols processed at once
+    :return: number of processed symbols
+    """
+    return encrypt_stream(reader, writer, -shift, chunk_size)
 
-    plaintext = ""
-    for symb in ciphertext:
-        if 'A' <= symb <= 'Z' or 'a' <= symb <= 'z':
-            symb_code = ord(symb) - 3
-            if ord('Z') < symb_code < ord('a') or symb_code < ord('A'):
-                symb_code += 26
-            plaintext += chr(symb_code)
-        else:
-            plaintext += symb
 
-    return plaintext
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Caesar cipher for files and stdin')
+    parser.add_argument('action', choices=['encrypt', 'decrypt'])
+    parser.add_argument('-s', dest='shift', help='Shift of the letters', type=int, default=3)
+    parser.add_argument('-i', dest='input', help='Input file (stdin by default)', default=None)
+    parser.add_argument('-o', dest='output', help='Output file (stdout by default)', default=None)
+    parser.add_argument('--chunk-size', help='Symbols processed at once', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    stream = encrypt_stream if args.action == 'encrypt' else decrypt_stream
+    with open_text(args.input, 'r') as reader, open_text(args.output, 'w') as writer:
+        stream(reader, writer, args.shift, args.chunk_size)
@@ -0,0 +1,246 @@
+import argparse
+import math
+import time
+from collections import Counter
+from typing import Dict, Tuple
+
+import numpy as np
+
+from caesar import decrypt_caesar, encrypt_caesar, open_text
+from vigenere import decrypt_vigenere, encrypt_vigenere
+
+# Relative frequencies of the letters a..z in English texts
+ENGLISH_FREQUENCIES = np.array([
+    8.167, 1.492, 2.782, 4.253, 12.702, 2.228, 2.015, 6.094, 6.966, 0.153, 0.772, 4.025, 2.406,
+    6.749, 7.507, 1.929, 0.095, 5.987, 6.327, 9.056, 2.758, 0.978, 2.360, 0.150, 1.974, 0.074,
+])
+ENGLISH_FREQUENCIES /= ENGLISH_FREQUENCIES.sum()
+
+# ROTATIONS[s] lists the letters that the letters a..z turn into after a shift by s
+ROTATIONS = (np.arange(26)[None, :] + np.arange(26)[:, None]) % 26
+
+
+def letter_positions(text: str) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    This function finds all latin letters of the text in one pass.
+    :param text: text to analyse
+    :return: positions of the letters in the text, numbers of the letters (0 for a/A ... 25 for z/Z)
+             and how many more lowercase than uppercase letters there are
+    """
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype='<u4')
+    lower = (codes >= ord('a')) & (codes <= ord('z'))
+    upper = (codes >= ord('A')) & (codes <= ord('Z'))
+    positions = np.flatnonzero(lower | upper)
+    letters = codes[positions].astype(np.int64)
+    letters -= np.where(lower[positions], ord('a'), ord('A'))
+    case_balance = int(np.count_nonzero(lower)) - int(np.count_nonzero(upper))
+    return positions, letters, case_balance
+
+
+def letter_histogram(text: str, period: int = 1) -> np.ndarray:
+    """
+    This function counts the letters of the text, separately for every position modulo period.
+    :param text: text to analyse
+    :param period: number of columns the text is split into
+    :return: array of shape (period, 26) with the numbers of letters in every column
+    """
+    positions, letters, _ = letter_positions(text)
+    return _histogram(positions, letters, period)
+
+
+def _histogram(positions: np.ndarray, letters: np.ndarray, period: int) -> np.ndarray:
+    columns = positions % period
+    return np.bincount(columns * 26 + letters, minlength=26 * period).reshape(period, 26)
+
+
+def chi_squared(counts: np.ndarray) -> np.ndarray:
+    """
+    This function compares the letter counts with English for every possible Caesar shift at once.
+    :param counts: array of 26 letter counts of the ciphertext
+    :return: array of 26 chi-squared statistics, the smallest one marks the most probable shift
+    """
+    expected = ENGLISH_FREQUENCIES * max(int(counts.sum()), 1)
+    observed = counts[ROTATIONS]
+    return ((observed - expected) ** 2 / expected).sum(axis=1)
+
+
+def index_of_coincidence(counts: np.ndarray) -> np.ndarray:
+    """
+    This function finds the probability that two random letters of a column are equal
+    (about 0.066 for English and 0.038 for random letters).
+    :param counts: array of shape (columns, 26) with letter counts
+    :return: index of coincidence of every column
+    """
+    totals = counts.sum(axis=1)
+    pairs = (counts * (counts - 1)).sum(axis=1)
+    return pairs / np.maximum(totals * (totals - 1), 1)
+
+
+def crack_caesar(ciphertext: str) -> int:
+    """
+    This function finds the shift of a text encrypted with a Caesar cipher.
+    :param ciphertext: encrypted text
+    :return: shift which decrypts the text
+    """
+    return int(np.argmin(chi_squared(letter_histogram(ciphertext)[0])))
+
+
+def kasiski_examination(ciphertext: str, max_length: int = 20, sample: int = 1 << 18) -> Dict[int, int]:
+    """
+    This function counts for every key length how many distances between repeated
+    trigrams of letters are divisible by it (Kasiski examination). The count for length 1
+    is the number of all distances.
+    :param ciphertext: encrypted text
+    :param max_length: the biggest key length to check
+    :param sample: number of symbols from the beginning of the text to use
+    :return: dict key length -> number of distances
+    """
+    codes = np.frombuffer(ciphertext[:sample].encode('utf-32-le'), dtype='<u4').astype(np.uint64)
+    if len(codes) < 3:
+        return {length: 0 for length in range(1, max_length + 1)}
+    is_letter = ((codes | 32) >= ord('a')) & ((codes | 32) <= ord('z'))
+    trigrams = (codes[:-2] << np.uint64(42)) | (codes[1:-1] << np.uint64(21)) | codes[2:]
+    starts = np.flatnonzero(is_letter[:-2] & is_letter[1:-1] & is_letter[2:])
+    order = np.argsort(trigrams[starts], kind='stable')
+    keys, positions = trigrams[starts][order], starts[order]
+    distances = np.diff(positions)[keys[1:] == keys[:-1]]
+    return {length: int(np.count_nonzero(distances % length == 0)) for length in range(1, max_length + 1)}
+
+
+def estimate_key_length(ciphertext: str, max_length: int = 20, method: str = 'ioc') -> int:
+    """
+    This function estimates the length of the keyword of a Vigenere cipher.
+    With the index of coincidence the shortest length whose columns look like English is chosen.
+    With the Kasiski examination every length gets a z-score: how many standard deviations more
+    distances it divides than the share 1 / length expected by chance. A multiple of the key length
+    m times longer scores about sqrt(m) times lower, so the best length is the key length or, when
+    its score is close to the best one by chance, the smallest divisor of it with a close score.
+    :param ciphertext: encrypted text
+    :param max_length: the biggest key length to check
+    :param method: 'ioc' or 'kasiski'
+    :return: key length
+    """
+    if method == 'kasiski':
+        votes = kasiski_examination(ciphertext, max_length)
+        if not votes[1]:
+            return 1
+        total = votes[1]
+        scores = {length: (count - total / length) / math.sqrt(total / length * (1 - 1 / length))
+                  for length, count in votes.items() if length > 1}
+        best_length = max(scores, key=scores.get)
+        best = scores[best_length]
+        if best < 3:
+            return 1
+        return min(length for length, score in scores.items()
+                   if best_length % length == 0 and score >= 0.9 * best)
+    if method != 'ioc':
+        raise ValueError('method must be "ioc" or "kasiski"')
+
+    positions, letters, _ = letter_positions(ciphertext)
+    scores = [index_of_coincidence(_histogram(positions, letters, period)).mean()
+              for period in range(1, max_length + 1)]
+    best = max(scores)
+    return next(period for period, score in enumerate(scores, 1) if score >= 0.9 * best)
+
+
+def crack_vigenere(ciphertext: str, max_length: int = 20, key_length: int = None) -> str:
+    """
+    This function finds the keyword of a text encrypted with a Vigenere cipher:
+    the key length is estimated and every column is solved as a Caesar cipher.
+    :param ciphertext: encrypted text
+    :param max_length: the biggest key length to check
+    :param key_length: key length, if it is known
+    :return: keyword (in the case of most letters of the text)
+    """
+    if key_length is None:
+        key_length = estimate_key_length(ciphertext, max_length)
+    positions, letters, case_balance = letter_positions(ciphertext)
+    counts = _histogram(positions, letters, key_length)
+    first = ord('a') if case_balance >= 0 else ord('A')
+    return ''.join(chr(first + int(np.argmin(chi_squared(column)))) for column in counts)
+
+
+def _naive_score(text: str) -> float:
+    counts = Counter(symb for symb in text.lower() if 'a' <= symb <= 'z')
+    total = max(sum(counts.values()), 1)
+    score = 0.0
+    for i, frequency in enumerate(ENGLISH_FREQUENCIES):
+        expected = frequency * total
+        score += (counts[chr(ord('a') + i)] - expected) ** 2 / expected
+    return score
+
+
+def naive_crack_caesar(ciphertext: str) -> int:
+    """
+    This function finds the shift of a Caesar cipher by decrypting the text with every shift.
+    :param ciphertext: encrypted text
+    :return: shift which decrypts the text
+    """
+    return min(range(26), key=lambda shift: _naive_score(decrypt_caesar(ciphertext, shift)))
+
+
+def naive_crack_vigenere(ciphertext: str, key_length: int) -> str:
+    """
+    This function finds the keyword of a Vigenere cipher by decrypting every column with every shift.
+    :param ciphertext: encrypted text
+    :param key_length: length of the keyword
+    :return: keyword
+    """
+    return ''.join(chr(ord('a') + naive_crack_caesar(ciphertext[i::key_length])) for i in range(key_length))
+
+
+def english_like_text(size: int, seed: int = 0) -> str:
+    """
+    This function generates random lowercase text with English letter frequencies and spaces.
+    :param size: number of symbols
+    :param seed: seed of the random generator
+    :return: text
+    """
+    rng = np.random.default_rng(seed)
+    symbols = np.frombuffer(b'abcdefghijklmnopqrstuvwxyz ', dtype=np.uint8)
+    weights = np.append(ENGLISH_FREQUENCIES * 0.82, 0.18)
+    return symbols[rng.choice(27, size=size, p=weights)].tobytes().decode('ascii')
+
+
+def benchmark(size: int = 10 ** 7, keyword: str = 'cryptanalysis') -> None:
+    """
+    This function compares the vectorized and naive crackers on a generated text.
+    :param size: number of symbols in the text
+    :param keyword: keyword for the Vigenere cipher
+    """
+    text = english_like_text(size)
+
+    ciphertext = encrypt_caesar(text, 11)
+    start = time.perf_counter()
+    shift = crack_caesar(ciphertext)
+    print('Caesar, vectorized: shift {} in {:.3f} s'.format(shift, time.perf_counter() - start))
+    start = time.perf_counter()
+    shift = naive_crack_caesar(ciphertext)
+    print('Caesar, naive:      shift {} in {:.3f} s'.format(shift, time.perf_counter() - start))
+
+    ciphertext = encrypt_vigenere(text, keyword)
+    start = time.perf_counter()
+    key = crack_vigenere(ciphertext)
+    print('Vigenere, vectorized: key {!r} in {:.3f} s'.format(key, time.perf_counter() - start))
+    start = time.perf_counter()
+    key = naive_crack_vigenere(ciphertext, len(keyword))
+    print('Vigenere, naive (length known): key {!r} in {:.3f} s'.format(key, time.perf_counter() - start))
+    if decrypt_vigenere(ciphertext, key) != text:
+        raise RuntimeError('Key {!r} does not decrypt the text, expected {!r}'.format(key, keyword))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Frequency analysis of Caesar and Vigenere ciphers')
+    parser.add_argument('action', choices=['caesar', 'vigenere', 'benchmark'])
+    parser.add_argument('-i', dest='input', help='File with the ciphertext (stdin by default)', default=None)
+    parser.add_argument('--size', help='Size of the benchmark text', type=int, default=10 ** 7)
+    args = parser.parse_args()
+    if args.action == 'benchmark':
+        benchmark(args.size)
+    else:
+        with open_text(args.input, 'r') as f:
+            ciphertext = f.read()
+        if args.action == 'caesar':
+            print(crack_caesar(ciphertext))
+        else:
+            print(crack_vigenere(ciphertext))
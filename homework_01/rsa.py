@@ -1,21 +1,80 @@
+import argparse
+import json
+import multiprocessing
 import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
 
 
-def is_prime(n: int) -> bool:
+SMALL_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+# Miller-Rabin with the bases from SMALL_PRIMES gives no false positives below this bound
+DETERMINISTIC_BOUND = 3317044064679887385961981
+
+DEFAULT_BITS = 2048
+PUBLIC_EXPONENT = 65537
+
+# Candidates for primes are checked in windows of this many numbers
+SIEVE_WINDOW = 4096
+
+_system_random = random.SystemRandom()
+
+
+def primes_below(limit: int) -> Tuple[int, ...]:
+    """
+    This function finds all primes below the limit with the sieve of Eratosthenes.
+    :param limit: upper bound
+    :return: primes in ascending order
+    """
+    sieve = bytearray([1]) * limit
+    sieve[:2] = b'\x00\x00'
+    for i in range(2, int(limit ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, limit, i)))
+    return tuple(i for i in range(limit) if sieve[i])
+
+
+SIEVE_PRIMES = primes_below(2000)
+
+
+def is_prime(n: int, rounds: int = 16) -> bool:
     """
-    This function tests if a number is prime or not.
+    This function tests if a number is prime or not (Miller-Rabin test).
+    The answer is exact for n < 3.3 * 10**24, for bigger numbers random bases
+    are checked in addition and a composite passes with probability below 4**(-rounds).
     :param n: number that must be tested
+    :param rounds: number of extra random bases for big numbers
     :return: is prime (True) or not (False)
     """
-    s = 1
-    for i in range(2, n):
-        if n % i == 0:
-            s = i
-            break
-    if s == 1:
-        return True
-    else:
+    if n < 2:
         return False
+    for p in SMALL_PRIMES:
+        if n % p == 0:
+            return n == p
+
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    bases = list(SMALL_PRIMES)
+    if n >= DETERMINISTIC_BOUND:
+        bases.extend(random.randrange(2, n - 1) for _ in range(rounds))
+    for a in bases:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
 
 
 def gcd(a: int, b: int) -> int:
@@ -25,12 +84,24 @@ def gcd(a: int, b: int) -> int:
     :param b: second number
     :return: the greatest common divisor
     """
-    while a != b:
-        if a > b:
-            a = a - b
-        else:
-            b = b - a
-    return a
+    while b:
+        a, b = b, a % b
+    return abs(a)
+
+
+def extended_gcd(a: int, b: int) -> Tuple[int, int, int]:
+    """
+    This function is an iterative Euclid's extended algorithm.
+    :param a: first number
+    :param b: second number
+    :return: the greatest common divisor g and numbers x, y such that a * x + b * y == g
+    """
+    x0, x1, y0, y1 = 1, 0, 0, 1
+    while b:
+        q, a, b = a // b, b, a % b
+        x0, x1 = x1, x0 - q * x1
+        y0, y1 = y1, y0 - q * y1
+    return a, x0, y0
 
 
 def multiplicative_inverse(e: int, phi: int) -> int:
@@ -40,44 +111,233 @@ def multiplicative_inverse(e: int, phi: int) -> int:
     :param phi: second prime number
     :return: multiplicative inverse of two numbers
     """
-    t = []
+    g, x, _ = extended_gcd(e, phi)
+    if g != 1:
+        raise ValueError('e and phi must be coprime')
+    return x % phi
+
+
+def random_prime(bits: int, avoid_residue_of: int = 0) -> int:
+    """
+    This function finds a random prime with exactly the given number of bits (two top bits are set,
+    so a product of two such primes has exactly 2 * bits bits). A window of odd numbers is first
+    sieved by small primes and only the survivors are checked with the Miller-Rabin test.
+    :param bits: size of the prime in bits
+    :param avoid_residue_of: if given, primes p with p % avoid_residue_of == 1 are skipped
+    :return: prime number
+    """
+    if bits < 3:
+        raise ValueError('bits must be at least 3')
     while True:
-        t.append([phi, e, phi % e, phi // e])
-        phi, e = e, t[-1][2]
-        if t[-1][2] == 0:
-            break
-    t[-1].extend([0, 1])
-    for i in range(len(t) - 2, -1, -1):
-        x = t[i + 1][-1]
-        y = t[i + 1][-2] - t[i + 1][-1] * t[i][3]
-        t[i].extend([x, y])
-    d = t[0][-1] % t[0][0]
-    return d
-
-
-def generate_keypair(p, q):
-    if not (is_prime(p) and is_prime(q)):
-        raise ValueError('Both numbers must be prime.')
-    elif p == q:
-        raise ValueError('p and q cannot be equal')
+        start = _system_random.getrandbits(bits) | (3 << (bits - 2)) | 1
+        window = bytearray([1]) * SIEVE_WINDOW
+        for p in SIEVE_PRIMES:
+            if p >= start:
+                break
+            # Offsets in the window are even, so mark start + 2 * i divisible by p
+            first = (-start * pow(2, -1, p)) % p if p != 2 else SIEVE_WINDOW
+            window[first::p] = bytes(len(range(first, SIEVE_WINDOW, p)))
+        for i in range(SIEVE_WINDOW):
+            candidate = start + 2 * i
+            if candidate.bit_length() > bits:
+                break
+            if avoid_residue_of and candidate % avoid_residue_of == 1:
+                continue
+            if window[i] and is_prime(candidate):
+                return candidate
+
+
+class PublicKey:
+    """ Public RSA key (e, n). Unpacks like the tuple (e, n). """
+
+    __slots__ = ('e', 'n')
+
+    def __init__(self, e: int, n: int) -> None:
+        self.e = e
+        self.n = n
+
+    def __iter__(self) -> Iterator[int]:
+        return iter((self.e, self.n))
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __hash__(self) -> int:
+        return hash((self.e, self.n))
+
+    def __repr__(self) -> str:
+        return 'PublicKey(e={}, n={})'.format(self.e, self.n)
+
+    def encrypt_int(self, m: int) -> int:
+        """
+        This function encrypts one number.
+        :param m: number smaller than n
+        :return: encrypted number
+        """
+        return pow(m, self.e, self.n)
+
+    def to_dict(self) -> dict:
+        """
+        This function converts the key into a dict that can be saved as JSON.
+        :return: dict with the key parameters
+        """
+        return {'e': self.e, 'n': self.n}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PublicKey":
+        """
+        This function restores a key saved with to_dict.
+        :param data: dict with the key parameters
+        :return: key
+        """
+        return cls(data['e'], data['n'])
+
+
+class PrivateKey:
+    """
+    Private RSA key (d, n) with precomputed parameters for the Chinese Remainder Theorem:
+    dp = d mod (p - 1), dq = d mod (q - 1), qinv = q^(-1) mod p.
+    Unpacks like the tuple (d, n).
+    """
+
+    __slots__ = ('d', 'n', 'p', 'q', 'dp', 'dq', 'qinv')
+
+    def __init__(self, d: int, n: int, p: int, q: int, dp: Optional[int] = None, dq: Optional[int] = None, qinv: Optional[int] = None) -> None:
+        if p * q != n:
+            raise ValueError('n must be equal to p * q')
+        self.d = d
+        self.n = n
+        self.p = p
+        self.q = q
+        self.dp = d % (p - 1) if dp is None else dp
+        self.dq = d % (q - 1) if dq is None else dq
+        self.qinv = multiplicative_inverse(q, p) if qinv is None else qinv
+
+    def __iter__(self) -> Iterator[int]:
+        return iter((self.d, self.n))
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __hash__(self) -> int:
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self) -> str:
+        return 'PrivateKey(d={}, n={})'.format(self.d, self.n)
+
+    def decrypt_int(self, c: int) -> int:
+        """
+        This function decrypts one number with two half-size exponentiations (CRT).
+        :param c: encrypted number
+        :return: decrypted number
+        """
+        m1 = pow(c, self.dp, self.p)
+        m2 = pow(c, self.dq, self.q)
+        h = self.qinv * (m1 - m2) % self.p
+        return m2 + h * self.q
+
+    def to_dict(self) -> dict:
+        """
+        This function converts the key into a dict that can be saved as JSON.
+        :return: dict with the key parameters
+        """
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PrivateKey":
+        """
+        This function restores a key saved with to_dict.
+        :param data: dict with the key parameters
+        :return: key
+        """
+        return cls(**{slot: data[slot] for slot in cls.__slots__ if slot in data})
+
+
+def generate_keys(p: int = None, q: int = None, bits: int = DEFAULT_BITS) -> Tuple[PublicKey, PrivateKey]:
+    """
+    This function generates RSA key objects. If p and q are not given, random primes
+    are found for a modulus of the given size and the public exponent is 65537.
+    :param p: first prime number
+    :param q: second prime number
+    :param bits: size of the modulus in bits, used when p and q are not given
+    :return: public and private keys
+    """
+    if p is None and q is None:
+        p = random_prime(bits // 2, avoid_residue_of=PUBLIC_EXPONENT)
+        q = random_prime(bits - bits // 2, avoid_residue_of=PUBLIC_EXPONENT)
+        while q == p:
+            q = random_prime(bits - bits // 2, avoid_residue_of=PUBLIC_EXPONENT)
+        e = PUBLIC_EXPONENT
+    else:
+        if not (is_prime(p) and is_prime(q)):
+            raise ValueError('Both numbers must be prime.')
+        elif p == q:
+            raise ValueError('p and q cannot be equal')
+        e = None
     n = p * q
     phi = (p-1)*(q-1)
 
-    # Choose an integer e such that e and phi(n) are coprime
-    e = random.randrange(1, phi)
-
-    # Use Euclid's Algorithm to verify that e and phi(n) are comprime
-    g = gcd(e, phi)
-    while g != 1:
+    if e is None:
+        # Choose an integer e such that e and phi(n) are coprime
         e = random.randrange(1, phi)
+
+        # Use Euclid's Algorithm to verify that e and phi(n) are comprime
         g = gcd(e, phi)
+        while g != 1:
+            e = random.randrange(1, phi)
+            g = gcd(e, phi)
 
     # Use Extended Euclid's Algorithm to generate the private key
     d = multiplicative_inverse(e, phi)
 
+    return PublicKey(e, n), PrivateKey(d, n, p, q)
+
+
+def generate_keypair(p=None, q=None, bits=DEFAULT_BITS):
+    public, private = generate_keys(p, q, bits)
     # Return public and private keypair
     # Public key is (e, n) and private key is (d, n)
-    return ((e, n), (d, n))
+    return (tuple(public), tuple(private))
+
+
+def generate_keypairs(count: int, bits: int = DEFAULT_BITS, workers: Optional[int] = None,
+                      time_budget: Optional[float] = None,
+                      progress: Optional[Callable[[int, int], None]] = None) -> List[Tuple[PublicKey, PrivateKey]]:
+    """
+    This function generates many random keypairs in a pool of processes.
+    When the time budget runs out the processes are terminated, so keypairs that are
+    still being generated are lost, but nothing keeps running after the function returns.
+    :param count: number of keypairs
+    :param bits: size of the modulus in bits
+    :param workers: number of processes (number of CPUs by default)
+    :param time_budget: seconds after which the generation stops and the ready keypairs are returned
+    :param progress: function called with the number of ready keypairs and count after each keypair
+    :return: list of keypairs (may be shorter than count if the time budget is exceeded)
+    >>> import os, subprocess, sys, time
+    >>> start = time.monotonic()
+    >>> code = 'import rsa; print(len(rsa.generate_keypairs(200, 2048, workers=2, time_budget=0.5)) < 200)'
+    >>> subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)),
+    ...                capture_output=True, text=True).stdout.strip()
+    'True'
+    >>> time.monotonic() - start < 5
+    True
+    """
+    keypairs = []
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    pool = multiprocessing.Pool(workers)
+    try:
+        results = pool.imap_unordered(partial(generate_keys, None, None), [bits] * count)
+        for _ in range(count):
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            keypairs.append(results.next(timeout))
+            if progress is not None:
+                progress(len(keypairs), count)
+    except multiprocessing.TimeoutError:
+        pass
+    finally:
+        pool.terminate()
+        pool.join()
+    return keypairs
 
 
 def encrypt(pk, plaintext):
@@ -85,31 +345,140 @@ def encrypt(pk, plaintext):
     key, n = pk
     # Convert each letter in the plaintext to numbers based on
     # the character using a^b mod m
-    cipher = [(ord(char) ** key) % n for char in plaintext]
+    cipher = [pow(ord(char), key, n) for char in plaintext]
     # Return the array of bytes
     return cipher
 
 
 def decrypt(pk, ciphertext):
+    if isinstance(pk, PrivateKey):
+        # Private key objects know p and q, so the Chinese Remainder Theorem can be used
+        plain = [chr(pk.decrypt_int(char)) for char in ciphertext]
+        return ''.join(plain)
     # Unpack the key into its components
     key, n = pk
     # Generate the plaintext based on the ciphertext and key using a^b mod m
-    plain = [chr((char ** key) % n) for char in ciphertext]
+    plain = [chr(pow(char, key, n)) for char in ciphertext]
     # Return the array of bytes as a string
     return ''.join(plain)
 
 
+def _block_sizes(n: int) -> Tuple[int, int]:
+    """
+    This function finds the sizes of plain and encrypted blocks for the modulus n.
+    :param n: modulus of the key
+    :return: number of message bytes packed into one integer and number of bytes in one encrypted block
+    """
+    data_size = (n.bit_length() - 1) // 8
+    if data_size < 1:
+        raise ValueError('n is too small for block encryption')
+    return data_size, (n.bit_length() + 7) // 8
+
+
+def _apply_key(pk, m: int) -> int:
+    """
+    This function raises a number to the key exponent, using CRT for private key objects.
+    :param pk: key object or tuple (key, n)
+    :param m: number smaller than n
+    :return: m^key mod n
+    """
+    if isinstance(pk, PrivateKey):
+        return pk.decrypt_int(m)
+    key, n = pk
+    return pow(m, key, n)
+
+
+def encrypt_blocks(pk, plaintext: str) -> bytes:
+    """
+    This function encrypts a message block by block: UTF-8 bytes of the message are
+    padded (0x80 and then zero bytes, ISO/IEC 7816-4) and packed into integers just under n.
+    :param pk: key object or tuple (key, n)
+    :param plaintext: message that must be encrypted
+    :return: encrypted blocks of equal size joined together
+    """
+    _, n = pk
+    data_size, cipher_size = _block_sizes(n)
+    data = plaintext.encode('utf-8') + b'\x80'
+    data += bytes(-len(data) % data_size)
+    blocks = []
+    for i in range(0, len(data), data_size):
+        m = int.from_bytes(data[i:i + data_size], 'big')
+        blocks.append(_apply_key(pk, m).to_bytes(cipher_size, 'big'))
+    return b''.join(blocks)
+
+
+def decrypt_blocks(pk, ciphertext: bytes) -> str:
+    """
+    This function decrypts a message encrypted with encrypt_blocks.
+    :param pk: key object or tuple (key, n)
+    :param ciphertext: encrypted blocks
+    :return: decrypted message
+    >>> public, private = generate_keys(1000003, 1000033)
+    >>> len(encrypt_blocks(public, ''))
+    5
+    >>> messages = ['', 'a', 'Привет, мир! €𝄞', 'x' * 100]
+    >>> [decrypt_blocks(private, encrypt_blocks(public, message)) == message for message in messages]
+    [True, True, True, True]
+    >>> decrypt_blocks(tuple(private), encrypt_blocks(public, 'Привет'))
+    'Привет'
+    """
+    _, n = pk
+    data_size, cipher_size = _block_sizes(n)
+    if len(ciphertext) % cipher_size:
+        raise ValueError('Ciphertext length must be a multiple of {} bytes'.format(cipher_size))
+    blocks = []
+    for i in range(0, len(ciphertext), cipher_size):
+        c = int.from_bytes(ciphertext[i:i + cipher_size], 'big')
+        blocks.append(_apply_key(pk, c).to_bytes(data_size, 'big'))
+    data = b''.join(blocks).rstrip(b'\x00')
+    if not data.endswith(b'\x80'):
+        raise ValueError('Wrong padding, probably the key does not match')
+    return data[:-1].decode('utf-8')
+
+
+def encrypt_many(pk, messages: Iterable[str], workers: Optional[int] = None, chunksize: int = 16) -> List[bytes]:
+    """
+    This function encrypts many messages with encrypt_blocks in a pool of processes.
+    :param pk: key object or tuple (key, n)
+    :param messages: messages that must be encrypted
+    :param workers: number of processes (number of CPUs by default)
+    :param chunksize: number of messages sent to a process at once
+    :return: encrypted messages in the same order
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(partial(encrypt_blocks, pk), messages, chunksize=chunksize))
+
+
+def decrypt_many(pk, ciphertexts: Iterable[bytes], workers: Optional[int] = None, chunksize: int = 16) -> List[str]:
+    """
+    This function decrypts many messages with decrypt_blocks in a pool of processes.
+    :param pk: key object or tuple (key, n)
+    :param ciphertexts: messages that must be decrypted
+    :param workers: number of processes (number of CPUs by default)
+    :param chunksize: number of messages sent to a process at once
+    :return: decrypted messages in the same order
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(partial(decrypt_blocks, pk), ciphertexts, chunksize=chunksize))
+
+
 if __name__ == '__main__':
-    print("RSA Encrypter/ Decrypter")
-    p = int(input("Enter a prime number (17, 19, 23, etc): "))
-    q = int(input("Enter another prime number (Not one you entered above): "))
-    print("Generating your public/private keypairs now . . .")
-    public, private = generate_keypair(p, q)
-    print("Your public key is ", public, " and your private key is ", private)
-    message = input("Enter a message to encrypt with your private key: ")
-    encrypted_msg = encrypt(private, message)
-    print("Your encrypted message is: ")
-    print(''.join(map(lambda x: str(x), encrypted_msg)))
-    print("Decrypting message with public key ", public, " . . .")
-    print("Your message is:")
-    print(decrypt(public, encrypted_msg))
+    parser = argparse.ArgumentParser(description='RSA key generator')
+    parser.add_argument('-b', dest='bits', help='Size of the modulus in bits', type=int, default=DEFAULT_BITS)
+    parser.add_argument('-n', dest='count', help='Number of keypairs', type=int, default=1)
+    parser.add_argument('-w', dest='workers', help='Number of processes', type=int, default=None)
+    parser.add_argument('-t', dest='time_budget', help='Time budget in seconds', type=float, default=None)
+    parser.add_argument('-m', dest='message', help='Message to encrypt with the first keypair', default=None)
+    args = parser.parse_args()
+
+    def report(done, total):
+        print('Generated {} of {} keypairs'.format(done, total), file=sys.stderr)
+
+    keypairs = generate_keypairs(args.count, args.bits, args.workers, args.time_budget, report)
+    for public, private in keypairs:
+        print(json.dumps({'public': public.to_dict(), 'private': private.to_dict()}))
+    if args.message is not None and keypairs:
+        public, private = keypairs[0]
+        encrypted_msg = encrypt_blocks(public, args.message)
+        print("Your encrypted message is:", encrypted_msg.hex(), file=sys.stderr)
+        print("Your message is:", decrypt_blocks(private, encrypted_msg), file=sys.stderr)
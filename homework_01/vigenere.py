@@ -1,3 +1,77 @@
+import argparse
+import string
+from functools import lru_cache
+from typing import Optional, TextIO, Tuple
+
+from caesar import CHUNK_SIZE, open_text, read_chunks
+
+
+def _shift_letter(code: int, key_code: int, sign: int) -> int:
+    """
+    This function moves one latin letter by the key letter, exactly as the cipher defines it.
+    :param code: code of the letter
+    :param key_code: code of the key letter
+    :param sign: 1 for encryption, -1 for decryption
+    :return: code of the moved letter
+    """
+    if ord('a') <= code <= ord('z'):
+        first, last = ord('a'), ord('z')
+    else:
+        first, last = ord('A'), ord('Z')
+    nindex = code + sign * (key_code - first)
+    if sign > 0 and nindex > last:
+        nindex -= 26
+    elif sign < 0 and nindex < first:
+        nindex += 26
+    return nindex
+
+
+@lru_cache(maxsize=None)
+def vigenere_tables(key_char: str, sign: int) -> Tuple[dict, Optional[bytes]]:
+    """
+    This function builds translation tables for one letter of the keyword.
+    :param key_char: letter of the keyword
+    :param sign: 1 for encryption, -1 for decryption
+    :return: table for str.translate and, if every result fits into a byte, table for bytes.translate
+    """
+    letters = string.ascii_letters
+    table = {ord(symb): _shift_letter(ord(symb), ord(key_char), sign) for symb in letters}
+    if max(table.values()) > 255:
+        return table, None
+    byte_table = bytearray(range(256))
+    for code, nindex in table.items():
+        byte_table[code] = nindex
+    return table, bytes(byte_table)
+
+
+def _translate_vigenere(text: str, keyword: str, sign: int, offset: int = 0) -> str:
+    """
+    This function applies the keyword to the text stripe by stripe:
+    all symbols that share a keyword letter are translated in one call.
+    :param text: word that must be processed
+    :param keyword: key which will be used
+    :param sign: 1 for encryption, -1 for decryption
+    :param offset: index of the first symbol of text in the whole message
+    :return: processed word
+    """
+    period = len(keyword)
+    tables = [vigenere_tables(keyword[(offset + i) % period], sign) for i in range(period)]
+    if all(byte_table is not None for _, byte_table in tables):
+        try:
+            buffer = bytearray(text, 'latin-1')
+        except UnicodeEncodeError:
+            pass
+        else:
+            for i, (_, byte_table) in enumerate(tables):
+                buffer[i::period] = buffer[i::period].translate(byte_table)
+            return buffer.decode('latin-1')
+
+    symbols = list(text)
+    for i, (table, _) in enumerate(tables):
+        symbols[i::period] = text[i::period].translate(table)
+    return ''.join(symbols)
+
+
 def encrypt_vigenere(plaintext: str, keyword: str) -> str:
     """
     This function encrypts a message using a Vigenere cipher.
@@ -5,24 +79,7 @@ def encrypt_vigenere(plaintext: str, keyword: str) -> str:
     :param keyword: key which will be used for encryption
     :return: encrypted word
     """
-
-    ciphertext = ''
-    for index, symb in enumerate(plaintext):
-        if 'a' <= symb <= 'z' or 'A' <= symb <= 'Z':
-            move = ord(keyword[index % len(keyword)])
-            if 'a' <= symb <= 'z':
-                move -= ord('a')
-            else:
-                move -= ord('A')
-            nindex = ord(symb) + move
-            if 'a' <= symb <= 'z' and nindex > ord('z'):
-                nindex -= 26
-            elif 'A' <= symb <= 'Z' and nindex > ord('Z'):
-                nindex -= 26
-            ciphertext += chr(nindex)
-        else:
-            ciphertext += symb
-    return ciphertext
+    return _translate_vigenere(plaintext, keyword, 1)
 
 
 def decrypt_vigenere(ciphertext: str, keyword: str) -> str:
@@ -32,17 +89,64 @@ def decrypt_vigenere(ciphertext: str, keyword: str) -> str:
     :param keyword:  key which will be used for decryption
     :return: decrypted word
     """
-    plaintext = ""
-    for num, symb in enumerate(ciphertext):
-        if 'A' <= symb <= 'Z' or 'a' <= symb <= 'z':
-            move = ord(keyword[num % len(keyword)])
-            move -= ord('a') if 'z' >= symb >= 'a' else ord('A')
-            nindex = ord(symb) - move
-            if 'a' <= symb <= 'z' and nindex < ord('a'):
-                nindex += 26
-            elif 'A' <= symb <= 'Z' and nindex < ord('A'):
-                nindex += 26
-            plaintext += chr(nindex)
-        else:
-            plaintext += symb
-    return plaintext
+    return _translate_vigenere(ciphertext, keyword, -1)
+
+
+def encrypt_stream(reader: TextIO, writer: TextIO, keyword: str, chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    This function encrypts a stream using a Vigenere cipher without loading it into memory.
+    The position in the keyword is carried over from one chunk to the next.
+    :param reader: stream with the message
+    :param writer: stream for the encrypted message
+    :param keyword: key which will be used for encryption
+    :param chunk_size: number of symbols processed at once
+    :return: number of processed symbols
+    >>> from io import StringIO
+    >>> message = 'attack at dawn, then retreat!'
+    >>> writer = StringIO()
+    >>> encrypt_stream(StringIO(message), writer, 'lemon', chunk_size=3)
+    29
+    >>> writer.getvalue() == encrypt_vigenere(message, 'lemon')
+    True
+    """
+    total = 0
+    for chunk in read_chunks(reader, chunk_size):
+        writer.write(_translate_vigenere(chunk, keyword, 1, total))
+        total += len(chunk)
+    return total
+
+
+def decrypt_stream(reader: TextIO, writer: TextIO, keyword: str, chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    This function decrypts a stream using a Vigenere cipher without loading it into memory.
+    The position in the keyword is carried over from one chunk to the next.
+    :param reader: stream with the encrypted message
+    :param writer: stream for the decrypted message
+    :param keyword: key which will be used for decryption
+    :param chunk_size: number of symbols processed at once
+    :return: number of processed symbols
+    >>> from io import StringIO
+    >>> writer = StringIO()
+    >>> decrypt_stream(StringIO(encrypt_vigenere('attack at dawn, then retreat!', 'lemon')), writer, 'lemon', chunk_size=3)
+    29
+    >>> writer.getvalue()
+    'attack at dawn, then retreat!'
+    """
+    total = 0
+    for chunk in read_chunks(reader, chunk_size):
+        writer.write(_translate_vigenere(chunk, keyword, -1, total))
+        total += len(chunk)
+    return total
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Vigenere cipher for files and stdin')
+    parser.add_argument('action', choices=['encrypt', 'decrypt'])
+    parser.add_argument('keyword', help='Key of the cipher')
+    parser.add_argument('-i', dest='input', help='Input file (stdin by default)', default=None)
+    parser.add_argument('-o', dest='output', help='Output file (stdout by default)', default=None)
+    parser.add_argument('--chunk-size', help='Symbols processed at once', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    stream = encrypt_stream if args.action == 'encrypt' else decrypt_stream
+    with open_text(args.input, 'r') as reader, open_text(args.output, 'w') as writer:
+        stream(reader, writer, args.keyword, args.chunk_size)
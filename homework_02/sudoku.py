@@ -1,21 +1,82 @@
 import random
-from typing import Optional
+from functools import lru_cache
+from math import isqrt
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+# Символы клеток для пазлов 9x9, 16x16 и 25x25 (пазл размера n использует первые n символов)
+SYMBOLS = '123456789ABCDEFGHIJKLMNOP'
+SYMBOL_DIGIT = {symbol: digit for digit, symbol in enumerate(SYMBOLS, 1)}
+
+
+class Geometry(NamedTuple):
+    """ Предвычисленные таблицы индексов для пазла size x size, клетки нумеруются построчно """
+    size: int
+    box: int
+    cells: int
+    all_candidates: int
+    row_of: tuple
+    col_of: tuple
+    box_of: tuple
+    units: tuple
+
+
+@lru_cache(maxsize=None)
+def geometry(size: int = 9) -> Geometry:
+    """ Построить таблицы индексов для пазла size x size
+    >>> geo = geometry(9)
+    >>> geo.box_of[80], len(geo.units), geo.units[18]
+    (8, 27, (0, 1, 2, 9, 10, 11, 18, 19, 20))
+    >>> geometry(16).box
+    4
+    """
+    box = isqrt(size)
+    if box * box != size or not 0 < size <= len(SYMBOLS):
+        raise ValueError('Sudoku size must be a square not bigger than {}: {}'.format(len(SYMBOLS), size))
+    cells = size * size
+    row_of = tuple(i // size for i in range(cells))
+    col_of = tuple(i % size for i in range(cells))
+    box_of = tuple((row_of[i] // box) * box + col_of[i] // box for i in range(cells))
+    units = tuple(tuple(i for i in range(cells) if table[i] == k)
+                  for table in (row_of, col_of, box_of) for k in range(size))
+    return Geometry(size, box, cells, (1 << size) - 1, row_of, col_of, box_of, units)
+
+
+def to_flat(grid: list) -> bytearray:
+    """ Записать пазл в плоский массив: номер символа в каждой клетке, 0 - пустая клетка
+    >>> list(to_flat([['1', '.', '.', '4'], ['.', '4', '1', '.'], ['.', '.', '.', '.'], ['4', '.', '.', '.']]))
+    [1, 0, 0, 4, 0, 4, 1, 0, 0, 0, 0, 0, 4, 0, 0, 0]
+    """
+    return bytearray(SYMBOL_DIGIT.get(value, 0) for row in grid for value in row)
+
+
+def from_flat(flat: bytearray) -> list:
+    """ Превратить плоский массив обратно в список строк пазла
+    >>> from_flat(bytearray([1, 0, 0, 4, 0, 4, 1, 0, 0, 0, 0, 0, 4, 0, 0, 0]))
+    [['1', '.', '.', '4'], ['.', '4', '1', '.'], ['.', '.', '.', '.'], ['4', '.', '.', '.']]
+    """
+    size = isqrt(len(flat))
+    return group([SYMBOLS[digit - 1] if digit else '.' for digit in flat], size)
 
 
 def read_sudoku(filename: str) -> list:
     """ Прочитать Судоку из указанного файла """
-    digits = [c for c in open(filename).read() if c in '123456789.']
-    grid = group(digits, 9)
+    digits = [c for c in open(filename).read() if c in SYMBOL_DIGIT or c == '.']
+    grid = group(digits, isqrt(len(digits)))
     return grid
 
 
 def display(values):
     """Вывод Судоку """
+    size = len(values)
+    box = isqrt(size)
     width = 2
-    line = '+'.join(['-' * (width * 3)] * 3)
-    for row in range(9):
-        print(''.join(values[row][col].center(width) + ('|' if str(col) in '25' else '') for col in range(9)))
-        if str(row) in '25':
+    line = '+'.join(['-' * (width * box)] * box)
+    for row in range(size):
+        print(''.join(values[row][col].center(width) + ('|' if col % box == box - 1 and col != size - 1 else '')
+                      for col in range(size)))
+        if row % box == box - 1 and row != size - 1:
             print(line)
     print()
 
@@ -66,9 +127,10 @@ def get_block(values: list, pos: tuple) -> list:
     >>> get_block(grid, (8, 8))
     ['2', '8', '.', '.', '.', '5', '.', '7', '9']
     """
-    x = (pos[0]//3)*3
-    y = (pos[1]//3)*3
-    return [values[x+i][y+j] for i in range(3) for j in range(3)]
+    box = isqrt(len(values))
+    x = (pos[0]//box)*box
+    y = (pos[1]//box)*box
+    return [values[x+i][y+j] for i in range(box) for j in range(box)]
 
 
 def find_empty_positions(grid: list) -> Optional[tuple]:
@@ -97,13 +159,14 @@ def find_possible_values(grid: list, pos: tuple) -> set:
     >>> values == {'2', '5', '9'}
     True
     """
-    values = set('123456789') - set(get_row(grid, pos)) - set(get_col(grid, pos)) - set(get_block(grid, pos))
+    values = set(SYMBOLS[:len(grid)]) - set(get_row(grid, pos)) - set(get_col(grid, pos)) \
+        - set(get_block(grid, pos))
     return values
 
 
 
-def solve(grid: list) -> Optional[list]:
-    """ Решение пазла, заданного в grid """
+def solve_backtracking(grid: list) -> Optional[list]:
+    """ Решение пазла, заданного в grid, перебором с возвратом """
     """ Как решать Судоку?
         1. Найти свободную позицию
         2. Найти все возможные значения, которые могут находиться на этой позиции
@@ -111,7 +174,7 @@ def solve(grid: list) -> Optional[list]:
             3.1. Поместить это значение на эту позицию
             3.2. Продолжить решать оставшуюся часть пазла
     >>> grid = read_sudoku('puzzle1.txt')
-    >>> solve(grid)
+    >>> solve_backtracking(grid)
     [['5', '3', '4', '6', '7', '8', '9', '1', '2'], ['6', '7', '2', '1', '9', '5', '3', '4', '8'], ['1', '9', '8', '3', '4', '2', '5', '6', '7'], ['8', '5', '9', '7', '6', '1', '4', '2', '3'], ['4', '2', '6', '8', '5', '3', '7', '9', '1'], ['7', '1', '3', '9', '2', '4', '8', '5', '6'], ['9', '6', '1', '5', '3', '7', '2', '8', '4'], ['2', '8', '7', '4', '1', '9', '6', '3', '5'], ['3', '4', '5', '2', '8', '6', '1', '7', '9']]
     """
     position = find_empty_positions(grid)
@@ -120,37 +183,555 @@ def solve(grid: list) -> Optional[list]:
     row, col = position
     for number in find_possible_values(grid, position):
         grid[row][col] = number
-        solution = solve(grid)
+        solution = solve_backtracking(grid)
         if solution:
             return solution
     grid[row][col] = '.'
     return None
 
 
+# Состояние решателя - кортеж (values, rows, cols, boxes): values - плоский bytearray с номерами
+# символов, а в rows, cols и boxes для каждой строки, столбца и квадрата хранится битовая маска
+# занятых символов (бит d - 1 установлен, если символ d уже стоит)
+
+def _empty_state(geo: Geometry) -> tuple:
+    return bytearray(geo.cells), [0] * geo.size, [0] * geo.size, [0] * geo.size
+
+
+def _place(geo: Geometry, state: tuple, i: int, digit: int) -> None:
+    values, rows, cols, boxes = state
+    bit = 1 << (digit - 1)
+    values[i] = digit
+    rows[geo.row_of[i]] |= bit
+    cols[geo.col_of[i]] |= bit
+    boxes[geo.box_of[i]] |= bit
+
+
+def _candidates(geo: Geometry, state: tuple, i: int) -> int:
+    _, rows, cols, boxes = state
+    return ~(rows[geo.row_of[i]] | cols[geo.col_of[i]] | boxes[geo.box_of[i]]) & geo.all_candidates
+
+
+def _propagate(geo: Geometry, state: tuple, hidden: bool = True) -> bool:
+    """ Расставить все одиночки: клетки с единственным кандидатом (naked singles)
+    и, если hidden, цифры, которые в строке, столбце или квадрате подходят только одной клетке
+    (hidden singles). Вернуть False, если пазл оказался противоречивым
+    """
+    values, rows, cols, boxes = state
+    row_of, col_of, box_of, all_candidates = geo.row_of, geo.col_of, geo.box_of, geo.all_candidates
+    progress = True
+    while progress:
+        progress = False
+        for i in range(geo.cells):
+            if not values[i]:
+                candidates = ~(rows[row_of[i]] | cols[col_of[i]] | boxes[box_of[i]]) & all_candidates
+                if not candidates:
+                    return False
+                if not candidates & (candidates - 1):
+                    _place(geo, state, i, candidates.bit_length())
+                    progress = True
+        if progress or not hidden:
+            continue
+        for unit in geo.units:
+            once = twice = used = 0
+            for i in unit:
+                if values[i]:
+                    used |= 1 << (values[i] - 1)
+                else:
+                    candidates = ~(rows[row_of[i]] | cols[col_of[i]] | boxes[box_of[i]]) & all_candidates
+                    twice |= once & candidates
+                    once |= candidates
+            if once | used != all_candidates:
+                return False
+            singles = once & ~twice
+            while singles:
+                bit = singles & -singles
+                singles ^= bit
+                for i in unit:
+                    if not values[i] and _candidates(geo, state, i) & bit:
+                        _place(geo, state, i, bit.bit_length())
+                        progress = True
+                        break
+    return True
+
+
+def _choose_cell(geo: Geometry, state: tuple) -> tuple:
+    """ Найти пустую клетку с наименьшим числом кандидатов (MRV) """
+    values, rows, cols, boxes = state
+    row_of, col_of, box_of, all_candidates = geo.row_of, geo.col_of, geo.box_of, geo.all_candidates
+    best = None
+    best_candidates = 0
+    best_count = geo.size + 1
+    for i in range(geo.cells):
+        if not values[i]:
+            candidates = ~(rows[row_of[i]] | cols[col_of[i]] | boxes[box_of[i]]) & all_candidates
+            count = bin(candidates).count('1')
+            if count < best_count:
+                best, best_candidates, best_count = i, candidates, count
+                if best_count == 2:
+                    break
+    return best, best_candidates
+
+
+def _digits(mask: int, shuffle: bool = False) -> list:
+    digits = []
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        digits.append(bit.bit_length())
+    if shuffle:
+        random.shuffle(digits)
+    return digits
+
+
+def _search(geo: Geometry, state: tuple, shuffle: bool = False) -> Optional[bytearray]:
+    """ Решить пазл, ветвясь по клетке с наименьшим числом кандидатов (MRV).
+    Если shuffle, кандидаты перебираются в случайном порядке
+    """
+    if not _propagate(geo, state):
+        return None
+    best, best_candidates = _choose_cell(geo, state)
+    if best is None:
+        return state[0]
+    for digit in _digits(best_candidates, shuffle):
+        branch = tuple(part[:] for part in state)
+        _place(geo, branch, best, digit)
+        solution = _search(geo, branch, shuffle)
+        if solution:
+            return solution
+    return None
+
+
+def _state_from_flat(geo: Geometry, flat: bytearray) -> Optional[tuple]:
+    state = _empty_state(geo)
+    for i in range(geo.cells):
+        digit = flat[i]
+        if digit:
+            if not _candidates(geo, state, i) & (1 << (digit - 1)):
+                return None
+            _place(geo, state, i, digit)
+    return state
+
+
+def _write_flat(grid: list, flat: bytearray) -> list:
+    size = len(grid)
+    for i, digit in enumerate(flat):
+        grid[i // size][i % size] = SYMBOLS[digit - 1]
+    return grid
+
+
+def solve_bitmask(grid: list) -> Optional[list]:
+    """ Решение пазла, заданного в grid, с помощью битовых масок кандидатов
+    строк, столбцов и квадратов, распространения одиночек и выбора клетки с
+    наименьшим числом кандидатов. Как и solve_backtracking, заполняет grid
+    >>> grid = read_sudoku('puzzle1.txt')
+    >>> solve_bitmask(grid) == solve_backtracking(read_sudoku('puzzle1.txt'))
+    True
+    >>> solve_bitmask([['1', '1', '.', '.', '.', '.', '.', '.', '.']] + [['.'] * 9] * 8) is None
+    True
+    """
+    geo = geometry(len(grid))
+    state = _state_from_flat(geo, to_flat(grid))
+    if state is None:
+        return None
+    values = _search(geo, state)
+    if values is None:
+        return None
+    return _write_flat(grid, values)
+
+
+# Точное покрытие для DLX: 4 * n^2 столбцов-ограничений (клетка занята, символ есть в строке,
+# в столбце и в квадрате) и n^3 строк-вариантов (символ d в клетке cell), по 4 узла в каждой.
+# Узлы хранятся в массивах ссылок: 0 - корень, 1..4 * n^2 - заголовки столбцов, дальше узлы строк
+
+def _dlx_row_columns(geo: Geometry, cell: int, digit: int) -> list:
+    size, cells = geo.size, geo.cells
+    row, col, box = geo.row_of[cell], geo.col_of[cell], geo.box_of[cell]
+    return [1 + cell, 1 + cells + row * size + digit, 1 + 2 * cells + col * size + digit,
+            1 + 3 * cells + box * size + digit]
+
+
+@lru_cache(maxsize=None)
+def _dlx_template(size: int) -> tuple:
+    """ Построить связи узлов матрицы точного покрытия для пустого пазла """
+    geo = geometry(size)
+    first_node = 4 * geo.cells + 1
+    nodes = first_node + geo.cells * size * 4
+    left, right, up, down = [0] * nodes, [0] * nodes, list(range(nodes)), list(range(nodes))
+    column = list(range(nodes))
+    for header in range(first_node):
+        left[header] = (header - 1) % first_node
+        right[header] = (header + 1) % first_node
+    for candidate in range(geo.cells * size):
+        first = first_node + candidate * 4
+        for k, header in enumerate(_dlx_row_columns(geo, candidate // size, candidate % size)):
+            node = first + k
+            left[node] = first + (k - 1) % 4
+            right[node] = first + (k + 1) % 4
+            column[node] = header
+            up[node] = up[header]
+            down[node] = header
+            down[up[header]] = node
+            up[header] = node
+    sizes = [0] + [size] * (4 * geo.cells)
+    return left, right, up, down, column, sizes
+
+
+class _DancingLinks:
+    """ Алгоритм X Кнута на танцующих ссылках """
+
+    def __init__(self, size: int = 9) -> None:
+        left, right, up, down, self.column, sizes = _dlx_template(size)
+        self.left, self.right, self.up, self.down, self.sizes = left[:], right[:], up[:], down[:], sizes[:]
+        self.size = size
+        self.first_node = 4 * size * size + 1
+        self.chosen = []
+        self.solution = None
+
+    def cover(self, header: int) -> None:
+        left, right, up, down, column, sizes = self.left, self.right, self.up, self.down, self.column, self.sizes
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        i = down[header]
+        while i != header:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                sizes[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, header: int) -> None:
+        left, right, up, down, column, sizes = self.left, self.right, self.up, self.down, self.column, self.sizes
+        i = up[header]
+        while i != header:
+            j = left[i]
+            while j != i:
+                sizes[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[header]] = header
+        left[right[header]] = header
+
+    def select(self, candidate: int) -> bool:
+        """ Включить вариант в решение заранее (для заполненных клеток пазла) """
+        first = self.first_node + candidate * 4
+        headers = [self.column[first + k] for k in range(4)]
+        for header in headers:
+            # Столбец уже покрыт, если он выпал из списка заголовков
+            if self.right[self.left[header]] != header:
+                return False
+            self.cover(header)
+        self.chosen.append(candidate)
+        return True
+
+    def search(self, limit: int) -> int:
+        """ Найти до limit решений, первое из них сохраняется в self.solution """
+        right, down, column, sizes = self.right, self.down, self.column, self.sizes
+        if right[0] == 0:
+            if self.solution is None:
+                self.solution = self.chosen[:]
+            return 1
+        header, best = 0, self.size + 1
+        j = right[0]
+        while j != 0:
+            if sizes[j] < best:
+                header, best = j, sizes[j]
+                if best <= 1:
+                    break
+            j = right[j]
+        if best == 0:
+            return 0
+        count = 0
+        self.cover(header)
+        i = down[header]
+        while i != header and count < limit:
+            self.chosen.append((i - self.first_node) // 4)
+            j = right[i]
+            while j != i:
+                self.cover(column[j])
+                j = right[j]
+            count += self.search(limit - count)
+            j = self.left[i]
+            while j != i:
+                self.uncover(column[j])
+                j = self.left[j]
+            self.chosen.pop()
+            i = down[i]
+        self.uncover(header)
+        return count
+
+
+def _dlx_from_grid(grid: list) -> Optional[_DancingLinks]:
+    size = len(grid)
+    links = _DancingLinks(size)
+    for cell, digit in enumerate(to_flat(grid)):
+        if digit and not links.select(cell * size + digit - 1):
+            return None
+    return links
+
+
+def solve_dlx(grid: list) -> Optional[list]:
+    """ Решение пазла, заданного в grid, как задачи точного покрытия (Dancing Links).
+    Как и solve_backtracking, заполняет grid
+    >>> grid = read_sudoku('puzzle1.txt')
+    >>> solve_dlx(grid) == solve_backtracking(read_sudoku('puzzle1.txt'))
+    True
+    """
+    links = _dlx_from_grid(grid)
+    if links is None or not links.search(1):
+        return None
+    size = len(grid)
+    flat = bytearray(size * size)
+    for candidate in links.solution:
+        cell, digit = divmod(candidate, size)
+        flat[cell] = digit + 1
+    return _write_flat(grid, flat)
+
+
+def count_solutions(grid: list, limit: int = 2) -> int:
+    """ Посчитать решения пазла, но не больше limit. При limit=2 проверяет единственность решения
+    >>> count_solutions(read_sudoku('puzzle1.txt'))
+    1
+    >>> count_solutions([['.'] * 9 for _ in range(9)], limit=5)
+    5
+    >>> count_solutions([['1', '1', '.', '.', '.', '.', '.', '.', '.']] + [['.'] * 9] * 8)
+    0
+    """
+    links = _dlx_from_grid(grid)
+    if links is None:
+        return 0
+    return links.search(limit)
+
+
+SOLVERS = {
+    'backtracking': solve_backtracking,
+    'bitmask': solve_bitmask,
+    'dlx': solve_dlx,
+}
+
+
+def solve(grid: list, method: str = 'backtracking') -> Optional[list]:
+    """ Решение пазла, заданного в grid, указанным методом (см. SOLVERS)
+    >>> grid = read_sudoku('puzzle1.txt')
+    >>> solve(grid, method='bitmask') == solve(read_sudoku('puzzle1.txt'))
+    True
+    """
+    if method not in SOLVERS:
+        raise ValueError('Unknown method: {}'.format(method))
+    return SOLVERS[method](grid)
+
+
 def check_solution(solution: list) -> bool:
     """ Если решение solution верно, то вернуть True, в противном случае False """
     # TODO: Add doctests with bad puzzles
+    size = len(solution)
+    box = isqrt(size)
+    expected = set(SYMBOLS[:size])
     for i in range(len(solution)):
         values_in_row = set(get_row(solution, (i, 0)))
-        if values_in_row != set('123456789'):
+        if values_in_row != expected:
             return False
 
     for j in range(len(solution)):
         values_in_col = set(get_col(solution, (0, j)))
-        if values_in_col != set('123456789'):
+        if values_in_col != expected:
             return False
 
-    for i in range(0, 7, 3):
-        for j in range(0, 7, 3):
+    for i in range(0, size, box):
+        for j in range(0, size, box):
             values_in_block = set(get_block(solution, (i, j)))
-            if values_in_block != set('123456789'):
+            if values_in_block != expected:
                 return False
 
     return True
 
 
-def generate_sudoku(N: int) -> Optional[list]:
-    """ Генерация судоку заполненного на N элементов
+def check_solutions(grids, chunk_size: int = 1 << 16):
+    """ Проверить сразу много решений, записанных в массив формы (k, n, n) с номерами символов 1..n
+    (см. to_flat). Решения обрабатываются порциями по chunk_size, чтобы ограничить память
+    :return: массив из k значений True/False
+    >>> solution = to_flat(solve(read_sudoku('puzzle1.txt')))
+    >>> broken = bytearray(solution)
+    >>> broken[0], broken[1] = broken[1], broken[0]
+    >>> check_solutions(np.array([solution, broken]).reshape(2, 9, 9)).tolist()
+    [True, False]
+    """
+    grids = np.asarray(grids)
+    k, size = grids.shape[0], grids.shape[-1]
+    box = isqrt(size)
+    if grids.shape[1:] != (size, size) or box * box != size:
+        raise ValueError('Grids must have shape (k, n, n) with n = m * m')
+    dtype = np.uint16 if size <= 16 else np.uint32
+    full = (1 << size) - 1
+    result = np.empty(k, dtype=bool)
+    for start in range(0, k, chunk_size):
+        chunk = grids[start:start + chunk_size]
+        in_range = ((chunk >= 1) & (chunk <= size)).all(axis=(1, 2))
+        # В каждой строке, столбце и квадрате n клеток, поэтому объединение масок
+        # равно полной маске только тогда, когда все символы встречаются по разу
+        masks = np.left_shift(dtype(1), (np.clip(chunk, 1, size) - 1).astype(dtype))
+        boxes = masks.reshape(-1, box, box, box, box).transpose(0, 1, 3, 2, 4).reshape(-1, size, size)
+        valid = in_range
+        for units in (masks, masks.transpose(0, 2, 1), boxes):
+            valid &= (np.bitwise_or.reduce(units, axis=2) == full).all(axis=1)
+        result[start:start + chunk_size] = valid
+    return result
+
+
+class SudokuValidator:
+    """ Поддерживает счётчики символов в строках, столбцах и квадратах пазла,
+    так что постановка и отмена символа и проверка корректности выполняются за O(1)
+    >>> validator = SudokuValidator(read_sudoku('puzzle1.txt'))
+    >>> validator.is_valid(), validator.is_solved()
+    (True, False)
+    >>> validator.can_place(0, 2, '5')
+    False
+    >>> validator.place(0, 2, '5')
+    >>> validator.is_valid()
+    False
+    >>> validator.undo()
+    >>> validator.is_valid()
+    True
+    """
+
+    def __init__(self, grid: list) -> None:
+        self.geo = geometry(len(grid))
+        size = self.geo.size
+        self.values = bytearray(self.geo.cells)
+        self.rows = bytearray(size * size)
+        self.cols = bytearray(size * size)
+        self.boxes = bytearray(size * size)
+        self.filled = 0
+        # Число лишних повторов символов во всех строках, столбцах и квадратах
+        self.conflicts = 0
+        self.history = []
+        for i, digit in enumerate(to_flat(grid)):
+            if digit:
+                self._set(i, digit)
+
+    def _counters(self, i: int, digit: int) -> tuple:
+        geo = self.geo
+        return ((self.rows, geo.row_of[i] * geo.size + digit - 1),
+                (self.cols, geo.col_of[i] * geo.size + digit - 1),
+                (self.boxes, geo.box_of[i] * geo.size + digit - 1))
+
+    def _set(self, i: int, digit: int) -> None:
+        old = self.values[i]
+        if old:
+            for counts, k in self._counters(i, old):
+                counts[k] -= 1
+                if counts[k]:
+                    self.conflicts -= 1
+            self.filled -= 1
+        if digit:
+            for counts, k in self._counters(i, digit):
+                if counts[k]:
+                    self.conflicts += 1
+                counts[k] += 1
+            self.filled += 1
+        self.values[i] = digit
+
+    def place(self, row: int, col: int, value: str) -> None:
+        """ Поставить символ value (или '.') в клетку, запомнив прежнее значение для undo """
+        i = row * self.geo.size + col
+        self.history.append((i, self.values[i]))
+        self._set(i, SYMBOL_DIGIT.get(value, 0))
+
+    def undo(self) -> None:
+        """ Отменить последний вызов place """
+        i, digit = self.history.pop()
+        self._set(i, digit)
+
+    def can_place(self, row: int, col: int, value: str) -> bool:
+        """ Проверить, что value ещё не встречается в строке, столбце и квадрате клетки """
+        i = row * self.geo.size + col
+        return not any(counts[k] for counts, k in self._counters(i, SYMBOL_DIGIT[value]))
+
+    def is_valid(self) -> bool:
+        """ Нет ли повторов символов в строках, столбцах и квадратах """
+        return not self.conflicts
+
+    def is_solved(self) -> bool:
+        """ Заполнены ли все клетки без повторов """
+        return not self.conflicts and self.filled == self.geo.cells
+
+
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+
+def rate_sudoku(grid: list) -> str:
+    """ Оценить сложность пазла: 'easy' - решается расстановкой клеток с единственным кандидатом,
+    'medium' - нужны ещё цифры, подходящие единственной клетке строки, столбца или квадрата,
+    'hard' - без перебора не решается
+    >>> rate_sudoku(read_sudoku('puzzle1.txt'))
+    'easy'
+    >>> rate_sudoku(read_sudoku('puzzle2.txt'))
+    'hard'
+    """
+    return _rate_flat(geometry(len(grid)), to_flat(grid))
+
+
+def _rate_flat(geo: Geometry, flat: bytearray, limit: str = 'medium') -> str:
+    """ Оценить сложность пазла в плоском виде; сложности выше limit не различаются
+    и оцениваются как 'hard'
+    """
+    for hidden, rating in ((False, 'easy'), (True, 'medium')):
+        state = _state_from_flat(geo, flat)
+        if state is not None and _propagate(geo, state, hidden) and all(state[0]):
+            return rating
+        if rating == limit:
+            break
+    return 'hard'
+
+
+def _has_other_solution(geo: Geometry, clues: bytearray, i: int, digit: int) -> bool:
+    """ Проверить, есть ли у пазла без подсказки в клетке i решение, где в ней стоит не digit """
+    state = _state_from_flat(geo, clues)
+    for other in _digits(_candidates(geo, state, i) & ~(1 << (digit - 1))):
+        branch = tuple(part[:] for part in state)
+        _place(geo, branch, i, other)
+        if _search(geo, branch):
+            return True
+    return False
+
+
+def _generate_unique(geo: Geometry, N: int, difficulty: Optional[str] = None) -> list:
+    """ Случайно заполнить сетку и убирать подсказки в случайном порядке, пока решение остаётся
+    единственным и подсказок больше N. Если задана сложность 'easy' или 'medium', подсказка
+    возвращается на место, когда без неё пазл стал бы сложнее
+    """
+    clues = _search(geo, _empty_state(geo), shuffle=True)
+    order = list(range(geo.cells))
+    random.shuffle(order)
+    count = geo.cells
+    for i in order:
+        if count <= N:
+            break
+        digit = clues[i]
+        clues[i] = 0
+        if difficulty in ('easy', 'medium'):
+            # Пазл, который решается без перебора, имеет единственное решение
+            keep = _rate_flat(geo, clues, difficulty) == 'hard'
+        else:
+            keep = _has_other_solution(geo, clues, i, digit)
+        if keep:
+            clues[i] = digit
+        else:
+            count -= 1
+    return from_flat(clues)
+
+
+def generate_sudoku(N: int, difficulty: Optional[str] = None, attempts: int = 100,
+                    size: int = 9) -> Optional[list]:
+    """ Генерация судоку size x size заполненного на N элементов с единственным решением.
+    Если N меньше, чем позволяют единственность решения и сложность, подсказок остаётся столько,
+    сколько удалось убрать. Если задана сложность (см. rate_sudoku), подсказки, без которых пазл
+    стал бы сложнее, не убираются; пазл, который получился проще нужного, генерируется заново,
+    но не больше attempts раз
     >>> grid = generate_sudoku(40)
     >>> sum(1 for row in grid for e in row if e == '.')
     41
@@ -164,25 +745,26 @@ def generate_sudoku(N: int) -> Optional[list]:
     >>> check_solution(solution)
     True
     >>> grid = generate_sudoku(0)
-    >>> sum(1 for row in grid for e in row if e == '.')
-    81
+    >>> count_solutions(grid)
+    1
     >>> solution = solve(grid)
     >>> check_solution(solution)
     True
+    >>> [rate_sudoku(generate_sudoku(0, difficulty=difficulty)) for difficulty in DIFFICULTIES]
+    ['easy', 'medium', 'hard']
+    >>> grid = generate_sudoku(180, size=16)
+    >>> sum(1 for row in grid for e in row if e == '.')
+    76
+    >>> check_solution(solve(grid, method='bitmask'))
+    True
     """
-    s = [['.'] * 9 for _ in range(9)]
-    grid = solve(s)
-    if grid is None:
-        return None
-    N = 81 - min(81, max(0, N))
-    while N:
-        row = random.randint(0, 8)
-        col = random.randint(0, 8)
-        if grid[row][col] != '.':
-            grid[row][col] = '.'
-            N -= 1
-    return grid
-
+    geo = geometry(size)
+    N = min(geo.cells, max(0, N))
+    for _ in range(attempts):
+        grid = _generate_unique(geo, N, difficulty)
+        if difficulty is None or rate_sudoku(grid) == difficulty:
+            return grid
+    return None
 
 
 if __name__ == '__main__':
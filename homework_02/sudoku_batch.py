@@ -0,0 +1,142 @@
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from math import isqrt
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from sudoku import SYMBOLS, generate_sudoku, group, solve
+
+
+def read_puzzles(filename: str) -> Iterator[str]:
+    """ Читать пазлы из файла, в котором каждый пазл записан одной строкой из 81 символа
+    (или 256 и 625 для пазлов 16x16 и 25x25, пустые клетки обозначаются '.' или '0').
+    Пустые строки и строки, начинающиеся с '#', пропускаются
+    """
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                size = isqrt(len(line))
+                if size * size != len(line) or isqrt(size) ** 2 != size or size > len(SYMBOLS):
+                    raise ValueError('Puzzle must have 81, 256 or 625 cells: {!r}'.format(line))
+                yield line.replace('0', '.')
+
+
+def solve_line(line: str, method: str = 'bitmask') -> Tuple[str, float]:
+    """ Решить пазл, записанный одной строкой
+    :return: решение одной строкой (пустая строка, если решения нет) и время решения в секундах
+    >>> solution, latency = solve_line('53..7....6..195....98....6.8...6...34..8.3..17...2...6.6....28....419..5....8..79')
+    >>> solution
+    '534678912672195348198342567859761423426853791713924856961537284287419635345286179'
+    """
+    start = time.perf_counter()
+    solution = solve(group(list(line), isqrt(len(line))), method)
+    latency = time.perf_counter() - start
+    if solution is None:
+        return '', latency
+    return ''.join(''.join(row) for row in solution), latency
+
+
+def solve_batch(puzzles: Iterable[str], workers: int = None, chunksize: int = 64,
+                method: str = 'bitmask') -> Iterator[Tuple[str, float]]:
+    """ Решить пазлы в пуле процессов. Пазлы отправляются порциями, так что в памяти
+    одновременно находится не больше workers * chunksize * 4 пазлов, а результаты
+    возвращаются в порядке пазлов
+    """
+    solver = partial(solve_line, method=method)
+    puzzles = iter(puzzles)
+    window = (workers or os.cpu_count() or 1) * chunksize * 4
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            batch = list(islice(puzzles, window))
+            if not batch:
+                return
+            yield from executor.map(solver, batch, chunksize=chunksize)
+
+
+def generate_line(seed: int, N: int, difficulty: Optional[str] = None, size: int = 9) -> str:
+    """ Сгенерировать пазл (см. generate_sudoku) и записать его одной строкой.
+    Генератор случайных чисел инициализируется seed, чтобы процессы пула не повторяли друг друга
+    :return: пазл одной строкой (пустая строка, если пазл нужной сложности не получился)
+    >>> generate_line(1, 30) == generate_line(1, 30)
+    True
+    >>> len(generate_line(2, 30, 'easy'))
+    81
+    """
+    random.seed(seed)
+    grid = generate_sudoku(N, difficulty, size=size)
+    if grid is None:
+        return ''
+    return ''.join(''.join(row) for row in grid)
+
+
+def generate_batch(count: int, N: int, difficulty: Optional[str] = None, size: int = 9,
+                   workers: int = None, chunksize: int = 16) -> Iterator[str]:
+    """ Сгенерировать count пазлов в пуле процессов, порциями, как в solve_batch
+    >>> from sudoku import rate_sudoku
+    >>> puzzles = list(generate_batch(4, 0, 'easy', workers=2, chunksize=1))
+    >>> len(set(puzzles)), [rate_sudoku(group(list(puzzle), 9)) for puzzle in puzzles]
+    (4, ['easy', 'easy', 'easy', 'easy'])
+    """
+    generator = partial(generate_line, N=N, difficulty=difficulty, size=size)
+    window = (workers or os.cpu_count() or 1) * chunksize * 4
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for start in range(0, count, window):
+            seeds = [random.getrandbits(64) for _ in range(min(window, count - start))]
+            yield from executor.map(generator, seeds, chunksize=chunksize)
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """ Найти перцентиль в отсортированном списке (ближайший ранг)
+    >>> percentile([1, 2, 3, 4], 50)
+    2
+    >>> percentile([1, 2, 3, 4], 99)
+    4
+    """
+    if not values:
+        return 0.0
+    rank = -int(-len(values) * percent // 100) - 1
+    return values[max(0, rank)]
+
+
+def run_batch(input_file: str, output_file: str, workers: int = None, chunksize: int = 64,
+              method: str = 'bitmask') -> dict:
+    """ Решить все пазлы из input_file и записать решения в output_file в том же порядке
+    :return: число пазлов, время работы, число пазлов в секунду и перцентили времени решения пазла
+    """
+    latencies = []
+    start = time.perf_counter()
+    with open(output_file, 'w') as out:
+        for solution, latency in solve_batch(read_puzzles(input_file), workers, chunksize, method):
+            out.write(solution + '\n')
+            latencies.append(latency)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'puzzles': len(latencies),
+        'seconds': elapsed,
+        'puzzles_per_second': len(latencies) / elapsed if elapsed else 0.0,
+        'p50': percentile(latencies, 50),
+        'p90': percentile(latencies, 90),
+        'p99': percentile(latencies, 99),
+        'max': latencies[-1] if latencies else 0.0,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Solve sudoku puzzles written one per line')
+    parser.add_argument('input', help='File with puzzles')
+    parser.add_argument('-o', dest='output', help='File for solutions', required=True)
+    parser.add_argument('-w', dest='workers', help='Number of processes', type=int, default=None)
+    parser.add_argument('--chunksize', help='Puzzles sent to a process at once', type=int, default=64)
+    parser.add_argument('--method', help='Solver', default='bitmask')
+    args = parser.parse_args()
+    stats = run_batch(args.input, args.output, args.workers, args.chunksize, args.method)
+    print('{puzzles} puzzles in {seconds:.2f} s, {puzzles_per_second:.1f} puzzles/s'.format(**stats), file=sys.stderr)
+    print('latency p50 {:.2f} ms, p90 {:.2f} ms, p99 {:.2f} ms, max {:.2f} ms'.format(
+        *(stats[key] * 1000 for key in ('p50', 'p90', 'p99', 'max'))), file=sys.stderr)
@@ -0,0 +1,50 @@
+import argparse
+import random
+import time
+
+from headless import HEADLESS_ENGINES
+
+
+def random_grid(nrows: int, ncols: int, density: float = 0.3, seed: int = 0) -> list:
+    """ Случайное поле, в котором клетка живая с вероятностью density """
+    rnd = random.Random(seed)
+    return [[int(rnd.random() < density) for _ in range(ncols)] for _ in range(nrows)]
+
+
+def generations_per_second(engine: str, clist: list, budget: float = 1.0, max_generations: int = 1000) -> float:
+    """ Сколько шагов в секунду выполняет движок: шаги выполняются, пока не пройдет
+    budget секунд или не будет сделано max_generations шагов (но хотя бы один шаг)
+    """
+    board = HEADLESS_ENGINES[engine].from_list(clist)
+    generations = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while generations < max_generations and (not generations or elapsed < budget):
+        board.step()
+        generations += 1
+        elapsed = time.perf_counter() - start
+    return generations / elapsed
+
+
+def run_benchmark(engines: list, sizes: list, budget: float = 1.0) -> list:
+    """ Измерить все движки на квадратных полях указанных размеров
+    :return: строки (движок, размер, шагов в секунду, обновлений клеток в секунду)
+    """
+    results = []
+    for size in sizes:
+        clist = random_grid(size, size)
+        for engine in engines:
+            speed = generations_per_second(engine, clist, budget)
+            results.append((engine, size, speed, speed * size * size))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the speed of Game of Life engines')
+    parser.add_argument('--engines', nargs='+', choices=sorted(HEADLESS_ENGINES), default=sorted(HEADLESS_ENGINES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[64, 256, 1024])
+    parser.add_argument('--budget', help='Seconds per measurement', type=float, default=1.0)
+    args = parser.parse_args()
+    print('{:>10} {:>6} {:>12} {:>16}'.format('engine', 'size', 'gens/s', 'cells/s'))
+    for engine, size, speed, cells in run_benchmark(args.engines, args.sizes, args.budget):
+        print('{:>10} {:>6} {:>12.1f} {:>16.0f}'.format(engine, size, speed, cells))
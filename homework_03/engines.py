@@ -0,0 +1,11 @@
+from life_bitpacked import BitBoard
+from life_numpy import NumpyBoard
+from life_sparse import SparseBoard
+
+# Альтернативные движки игры: классы полей с методами from_list, to_list и step,
+# доступом к клетке по индексу (row, col) и атрибутами nrows и ncols
+ENGINES = {
+    'numpy': NumpyBoard,
+    'bitpacked': BitBoard,
+    'sparse': SparseBoard,
+}
@@ -0,0 +1,168 @@
+import argparse
+from functools import lru_cache
+
+from life_with_classes import CellList
+
+# Размеры кэшей: при переполнении вытесняются давно не использованные узлы и результаты
+JOIN_CACHE_SIZE = 1 << 20
+SUCCESSOR_CACHE_SIZE = 1 << 20
+
+
+class Node:
+    """ Узел квадродерева: квадрат 2**k x 2**k из четырех квадрантов
+    a (северо-запад), b (северо-восток), c (юго-запад) и d (юго-восток).
+    Узлы создаются только через join, поэтому одинаковые квадраты - это один объект,
+    и узлы сравниваются и хэшируются по идентичности
+    """
+    __slots__ = ('k', 'a', 'b', 'c', 'd', 'n')
+
+    def __init__(self, k: int, a=None, b=None, c=None, d=None, n: int = 0) -> None:
+        self.k = k
+        self.a, self.b, self.c, self.d = a, b, c, d
+        # Число живых клеток в квадрате
+        self.n = n
+
+    def __repr__(self) -> str:
+        return 'Node(k={}, n={})'.format(self.k, self.n)
+
+
+ON = Node(0, n=1)
+OFF = Node(0, n=0)
+
+
+@lru_cache(maxsize=JOIN_CACHE_SIZE)
+def join(a: Node, b: Node, c: Node, d: Node) -> Node:
+    """ Собрать узел из четырех квадрантов одного уровня """
+    return Node(a.k + 1, a, b, c, d, a.n + b.n + c.n + d.n)
+
+
+@lru_cache(maxsize=None)
+def get_zero(k: int) -> Node:
+    """ Пустой квадрат уровня k """
+    return OFF if k == 0 else join(get_zero(k - 1), get_zero(k - 1), get_zero(k - 1), get_zero(k - 1))
+
+
+def centre(m: Node) -> Node:
+    """ Узел уровня k + 1, в центре которого находится m, а вокруг - мертвые клетки """
+    z = get_zero(m.k - 1)
+    return join(join(z, z, z, m.a), join(z, z, m.b, z),
+                join(z, m.c, z, z), join(m.d, z, z, z))
+
+
+def _life(a, b, c, d, e, f, g, h, i) -> Node:
+    """ Следующее состояние клетки e по ее восьми соседям """
+    outer = a.n + b.n + c.n + d.n + f.n + g.n + h.n + i.n
+    return ON if outer == 3 or (e.n and outer == 2) else OFF
+
+
+def _life_4x4(m: Node) -> Node:
+    """ Центральный квадрат 2x2 квадрата 4x4 через одно поколение """
+    ad = _life(m.a.a, m.a.b, m.b.a, m.a.c, m.a.d, m.b.c, m.c.a, m.c.b, m.d.a)
+    bc = _life(m.a.b, m.b.a, m.b.b, m.a.d, m.b.c, m.b.d, m.c.b, m.d.a, m.d.b)
+    cb = _life(m.a.c, m.a.d, m.b.c, m.c.a, m.c.b, m.d.a, m.c.c, m.c.d, m.d.c)
+    da = _life(m.a.d, m.b.c, m.b.d, m.c.b, m.d.a, m.d.b, m.c.d, m.d.c, m.d.d)
+    return join(ad, bc, cb, da)
+
+
+@lru_cache(maxsize=SUCCESSOR_CACHE_SIZE)
+def successor(m: Node, j: int) -> Node:
+    """ Центральный квадрат уровня k - 1 узла m через 2**j поколений (j <= k - 2) """
+    if m.n == 0:
+        return m.a
+    if m.k == 2:
+        return _life_4x4(m)
+    j = min(j, m.k - 2)
+    c1 = successor(m.a, j)
+    c2 = successor(join(m.a.b, m.b.a, m.a.d, m.b.c), j)
+    c3 = successor(m.b, j)
+    c4 = successor(join(m.a.c, m.a.d, m.c.a, m.c.b), j)
+    c5 = successor(join(m.a.d, m.b.c, m.c.b, m.d.a), j)
+    c6 = successor(join(m.b.c, m.b.d, m.d.a, m.d.b), j)
+    c7 = successor(m.c, j)
+    c8 = successor(join(m.c.b, m.d.a, m.c.d, m.d.c), j)
+    c9 = successor(m.d, j)
+    if j < m.k - 2:
+        # Девять квадратов уже продвинуты на 2**j поколений, осталось взять их центры
+        return join(join(c1.d, c2.c, c4.b, c5.a), join(c2.d, c3.c, c5.b, c6.a),
+                    join(c4.d, c5.c, c7.b, c8.a), join(c5.d, c6.c, c8.b, c9.a))
+    return join(successor(join(c1, c2, c4, c5), j), successor(join(c2, c3, c5, c6), j),
+                successor(join(c4, c5, c7, c8), j), successor(join(c5, c6, c8, c9), j))
+
+
+def construct(cells: set, size: int) -> Node:
+    """ Построить квадродерево по множеству живых клеток (row, col) квадрата size x size """
+    k = max((size - 1).bit_length(), 3)
+    level = {pos: ON for pos in cells}
+    for current in range(k):
+        z = get_zero(current)
+        parents = {}
+        for row, col in {(row >> 1, col >> 1) for row, col in level}:
+            row2, col2 = row * 2, col * 2
+            parents[row, col] = join(level.get((row2, col2), z), level.get((row2, col2 + 1), z),
+                                     level.get((row2 + 1, col2), z), level.get((row2 + 1, col2 + 1), z))
+        level = parents
+    return level.get((0, 0), get_zero(k))
+
+
+def live_cells(m: Node, row: int, col: int, window: tuple) -> list:
+    """ Живые клетки узла m с левым верхним углом (row, col), попадающие в окно
+    (top, left, nrows, ncols)
+    """
+    top, left, nrows, ncols = window
+    size = 1 << m.k
+    if m.n == 0 or row >= top + nrows or col >= left + ncols or row + size <= top or col + size <= left:
+        return []
+    if m.k == 0:
+        return [(row, col)]
+    half = size >> 1
+    return (live_cells(m.a, row, col, window) + live_cells(m.b, row, col + half, window) +
+            live_cells(m.c, row + half, col, window) + live_cells(m.d, row + half, col + half, window))
+
+
+def _is_padded(m: Node) -> bool:
+    """ Все живые клетки лежат в центральном квадрате со стороной в четверть узла """
+    return m.n == join(m.a.d.d, m.b.c.c, m.c.b.b, m.d.a.a).n
+
+
+def advance(cell_list: CellList, generations: int, window: tuple = None) -> CellList:
+    """ Найти состояние поля через generations поколений алгоритмом HashLife.
+    В отличие от CellList.update поле считается бесконечной плоскостью: клетки за краем
+    не считаются мертвыми, и узор может выйти за пределы исходного поля.
+    :param cell_list: исходное поле
+    :param generations: число поколений
+    :param window: часть плоскости (top, left, nrows, ncols) в координатах исходного поля,
+                   по умолчанию - само исходное поле
+    :return: поле размером nrows x ncols с клетками из окна
+    """
+    if window is None:
+        window = (0, 0, cell_list.nrows, cell_list.ncols)
+    cells = {(cell.row, cell.col) for cell in cell_list if cell.is_alive()}
+    node = construct(cells, max(cell_list.nrows, cell_list.ncols, 1))
+    # Координаты левого верхнего угла узла на плоскости
+    row = col = 0
+    # Поколения продвигаются степенями двойки, от старших к младшим
+    for j in reversed(range(generations.bit_length())):
+        if not generations >> j & 1:
+            continue
+        while node.k < j + 3 or not _is_padded(node):
+            shift = 1 << (node.k - 1)
+            node = centre(node)
+            row, col = row - shift, col - shift
+        shift = 1 << (node.k - 2)
+        node = successor(node, j)
+        row, col = row + shift, col + shift
+
+    top, left, nrows, ncols = window
+    result = CellList(nrows, ncols)
+    for cell_row, cell_col in live_cells(node, row, col, window):
+        result.set_state(cell_row - top, cell_col - left, True)
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run Game of Life on an infinite plane with HashLife')
+    parser.add_argument('pattern', help='File with the pattern in grid.txt format')
+    parser.add_argument('-n', dest='generations', help='Number of generations', type=int, required=True)
+    parser.add_argument('-w', dest='window', help='Window top left nrows ncols', type=int, nargs=4, default=None)
+    args = parser.parse_args()
+    print(advance(CellList.from_file(args.pattern), args.generations, args.window), end='')
@@ -0,0 +1,114 @@
+import argparse
+import os
+import sys
+from typing import Iterator, TextIO, Tuple
+
+# pygame печатает приветствие при импорте, а stdout нужен для поля
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from engines import ENGINES
+from life import GameOfLife
+from life_with_classes import CellList
+
+
+class ListEngine:
+    """ Шаги игры через GameOfLife.update_cell_list из life.py """
+
+    def __init__(self, clist: list) -> None:
+        self.nrows = len(clist)
+        self.ncols = len(clist[0]) if clist else 0
+        self.game = GameOfLife(width=self.ncols, height=self.nrows, cell_size=1)
+        self.game.clist = clist
+
+    @classmethod
+    def from_list(cls, clist: list) -> "ListEngine":
+        return cls([line[:] for line in clist])
+
+    def to_list(self) -> list:
+        return [line[:] for line in self.game.clist]
+
+    def step(self) -> "ListEngine":
+        self.game.update_cell_list(self.game.clist)
+        return self
+
+
+class ClassesEngine:
+    """ Шаги игры через CellList.update из life_with_classes.py """
+
+    def __init__(self, cell_list: CellList) -> None:
+        self.nrows = cell_list.nrows
+        self.ncols = cell_list.ncols
+        self.cell_list = cell_list
+
+    @classmethod
+    def from_list(cls, clist: list) -> "ClassesEngine":
+        return cls(CellList.from_list(clist))
+
+    def to_list(self) -> list:
+        return self.cell_list.to_list()
+
+    def step(self) -> "ClassesEngine":
+        self.cell_list.update()
+        return self
+
+
+# Все движки, которые можно запустить без экрана
+HEADLESS_ENGINES = {
+    'list': ListEngine,
+    'classes': ClassesEngine,
+}
+HEADLESS_ENGINES.update(ENGINES)
+
+
+def read_grid(filename: str) -> list:
+    """ Прочитать поле в формате grid.txt: строка файла - строка поля из 0 и 1 """
+    with open(filename) as f:
+        return [[int(symb) for symb in line if symb in '01'] for line in f if line.strip()]
+
+
+def write_grid(clist: list, f: TextIO) -> None:
+    """ Записать поле в формате grid.txt """
+    for line in clist:
+        f.write(''.join('1' if state else '0' for state in line) + '\n')
+
+
+def simulate(clist: list, generations: int, engine: str = 'numpy',
+             every: int = None) -> Iterator[Tuple[int, list]]:
+    """ Выполнить generations шагов игры без pygame
+    :param clist: начальное поле, представленное в виде матрицы
+    :param generations: число шагов
+    :param engine: движок из HEADLESS_ENGINES
+    :param every: через сколько шагов возвращать промежуточное поле (None - только последнее)
+    :return: пары (номер поколения, поле); последним всегда идет поле после generations шагов
+    """
+    if engine not in HEADLESS_ENGINES:
+        raise ValueError('Unknown engine: {}'.format(engine))
+    board = HEADLESS_ENGINES[engine].from_list(clist)
+    for generation in range(1, generations + 1):
+        board.step()
+        if every and generation % every == 0 and generation != generations:
+            yield generation, board.to_list()
+    yield generations, board.to_list()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run Game of Life without a screen')
+    parser.add_argument('pattern', help='File with the pattern in grid.txt format')
+    parser.add_argument('-n', dest='generations', help='Number of generations', type=int, required=True)
+    parser.add_argument('--engine', choices=sorted(HEADLESS_ENGINES), default='numpy')
+    parser.add_argument('-o', dest='output', help='File for the final grid (stdout by default)', default=None)
+    parser.add_argument('--every', help='Save a snapshot every N generations', type=int, default=None)
+    parser.add_argument('--snapshots', help='Directory for snapshots', default='snapshots')
+    args = parser.parse_args()
+
+    result = None
+    for generation, result in simulate(read_grid(args.pattern), args.generations, args.engine, args.every):
+        if args.every and generation % args.every == 0:
+            os.makedirs(args.snapshots, exist_ok=True)
+            with open(os.path.join(args.snapshots, 'gen_{:08d}.txt'.format(generation)), 'w') as f:
+                write_grid(result, f)
+    if args.output:
+        with open(args.output, 'w') as f:
+            write_grid(result, f)
+    else:
+        write_grid(result, sys.stdout)
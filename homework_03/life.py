@@ -3,18 +3,21 @@ from pygame.locals import *
 import random
 import copy
 
+from engines import ENGINES
+from renderer import Renderer
+
 
 class GameOfLife:
 
-    def __init__(self, width=640, height=480, cell_size=10, speed=10):
+    def __init__(self, width=640, height=480, cell_size=10, speed=10, engine='list', render='dirty'):
         self.width = width
         self.height = height
         self.cell_size = cell_size
 
         # Устанавливаем размер окна
         self.screen_size = width, height
-        # Создание нового окна
-        self.screen = pygame.display.set_mode(self.screen_size)
+        # Окно создается в run, чтобы игру можно было считать без экрана
+        self.screen = None
 
         # Вычисляем количество ячеек по вертикали и горизонтали
         self.cell_width = self.width // self.cell_size
@@ -23,6 +26,47 @@ class GameOfLife:
         # Скорость протекания игры
         self.speed = speed
 
+        # Движок, который выполняет шаги игры: 'list' или один из ENGINES
+        if engine != 'list' and engine not in ENGINES:
+            raise ValueError('Unknown engine: {}'.format(engine))
+        self.engine = engine
+        # Поле движка, которое хранится между шагами; список клеток строится из него,
+        # только когда его запрашивают через clist
+        self.board = None
+        self._clist = []
+
+        # Способ отрисовки: 'dirty' - только изменившиеся клетки, 'array' - все поле через surfarray
+        if render not in ('dirty', 'array'):
+            raise ValueError('Unknown render: {}'.format(render))
+        self.render = render
+
+    @property
+    def clist(self) -> list:
+        """ Игровое поле, представленное в виде матрицы """
+        if self._clist is None:
+            self._clist = self.board.to_list()
+        return self._clist
+
+    @clist.setter
+    def clist(self, clist: list) -> None:
+        self._clist = clist
+        if self.engine != 'list':
+            self.board = ENGINES[self.engine].from_list(clist)
+
+    def step(self) -> None:
+        """ Выполнить один шаг игры; для движков из ENGINES поле не преобразуется в список """
+        if self.engine == 'list':
+            self.update_cell_list(self.clist)
+        else:
+            self.board.step()
+            self._clist = None
+
+    def cells(self):
+        """ Текущее поле для отрисовки: список списков или массив NumPy """
+        if self.engine == 'list':
+            return self.clist
+        return self.board.to_array()
+
     def draw_grid(self):
         """ Отрисовать сетку """
         for x in range(0, self.width, self.cell_size):
@@ -35,9 +79,12 @@ class GameOfLife:
     def run(self):
         """ Запустить игру """
         pygame.init()
+        # Создание нового окна
+        self.screen = pygame.display.set_mode(self.screen_size)
         clock = pygame.time.Clock()
         pygame.display.set_caption('Game of Life')
-        self.screen.fill(pygame.Color('white'))
+        renderer = Renderer(self.screen, self.cell_size)
+        draw = renderer.draw if self.render == 'dirty' else renderer.draw_array
 
         self.clist = self.cell_list()
 
@@ -47,11 +94,9 @@ class GameOfLife:
                 if event.type == QUIT:
                     running = False
 
-            self.draw_grid()
-            self.draw_cell_list(self.clist)
-            self.clist = self.update_cell_list(self.clist)
+            pygame.display.update(draw(self.cells()))
+            self.step()
 
-            pygame.display.flip()
             clock.tick(self.speed)
         pygame.quit()
 
@@ -61,16 +106,17 @@ class GameOfLife:
         каждая клетка равновероятно может быть живой (1) или мертвой (0).
         :return: Список клеток, представленный в виде матрицы
         """
-        self.clist = []
+        clist = []
         small_list = []
         if randomize is True:
             for i in range(self.cell_height):
                 for j in range(self.cell_width):
                     small_list.append(random.randint(0, 1))
-                self.clist.append(small_list)
+                clist.append(small_list)
                 small_list = []
         else:
-            self.clist = [[0] * self.cell_width for _ in range(self.cell_height)]
+            clist = [[0] * self.cell_width for _ in range(self.cell_height)]
+        self.clist = clist
         return self.clist
 
     def draw_cell_list(self, clist: list):
@@ -108,6 +154,12 @@ class GameOfLife:
         :param cell_list: Игровое поле, представленное в виде матрицы
         :return: Обновленное игровое поле
         """
+        if self.engine != 'list':
+            # Список мог измениться на месте, поэтому поле движка строится по нему заново;
+            # без преобразований поле обновляется методом step
+            self.clist = cell_list
+            self.step()
+            return self.clist
         clist_copy = copy.deepcopy(self.clist)
         for i in range(self.cell_height):
             for j in range(self.cell_width):
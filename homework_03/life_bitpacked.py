@@ -0,0 +1,96 @@
+import numpy as np
+
+ONE = np.uint64(1)
+LAST_BIT = np.uint64(63)
+
+
+class BitBoard:
+    """ Игровое поле, в котором каждая клетка занимает один бит: строка поля хранится
+    в словах uint64, столбец c находится в бите c % 64 слова c // 64.
+    Клетки за краем поля считаются мертвыми, как и в GameOfLife.get_neighbours
+    """
+
+    def __init__(self, nrows: int, ncols: int) -> None:
+        self.nrows = nrows
+        self.ncols = ncols
+        self.nwords = (ncols + 63) // 64
+        self.words = np.zeros((nrows, self.nwords), dtype=np.uint64)
+        # Маска последнего слова строки: биты за правым краем поля должны оставаться нулями
+        self._tail = np.uint64((1 << (ncols % 64 or 64)) - 1)
+
+    @classmethod
+    def from_list(cls, clist: list) -> "BitBoard":
+        """ Создать поле из списка клеток, представленного в виде матрицы """
+        nrows = len(clist)
+        ncols = len(clist[0]) if nrows else 0
+        board = cls(nrows, ncols)
+        if board.words.size:
+            cells = np.zeros((nrows, board.nwords * 64), dtype=np.uint8)
+            cells[:, :ncols] = clist
+            packed = np.packbits(cells, axis=1, bitorder='little')
+            board.words[...] = packed.view('<u8')
+        return board
+
+    def to_list(self) -> list:
+        """ Вернуть поле в виде списка списков из 0 и 1 """
+        if not self.words.size:
+            return [[] for _ in range(self.nrows)]
+        packed = self.words.astype('<u8').view(np.uint8)
+        return np.unpackbits(packed, axis=1, count=self.ncols, bitorder='little').tolist()
+
+    def to_array(self) -> np.ndarray:
+        """ Вернуть поле в виде массива uint8 """
+        packed = self.words.astype('<u8').view(np.uint8)
+        return np.unpackbits(packed, axis=1, count=self.ncols, bitorder='little').reshape(self.nrows, self.ncols)
+
+    def __getitem__(self, pos: tuple) -> int:
+        row, col = pos
+        return (int(self.words[row, col >> 6]) >> (col & 63)) & 1
+
+    def __setitem__(self, pos: tuple, state: int) -> None:
+        row, col = pos
+        bit = np.uint64(1 << (col & 63))
+        if state:
+            self.words[row, col >> 6] |= bit
+        else:
+            self.words[row, col >> 6] &= ~bit
+
+    def population(self) -> int:
+        """ Число живых клеток """
+        return int(np.bitwise_count(self.words).sum())
+
+    def step(self) -> "BitBoard":
+        """ Выполнить один шаг игры сразу для 64 клеток в каждом слове.
+        Соседи считаются двоичными сумматорами: для каждой строки находится сумма трех
+        соседних по горизонтали клеток (два бита), затем суммы трех строк складываются
+        """
+        padded = np.zeros((self.nrows + 2, self.nwords), dtype=np.uint64)
+        padded[1:-1] = self.words
+        # Соседи слева и справа: сдвиг на один бит с переносом между словами строки
+        west = padded << ONE
+        west[:, 1:] |= padded[:, :-1] >> LAST_BIT
+        east = padded >> ONE
+        east[:, :-1] |= padded[:, 1:] << LAST_BIT
+
+        # Сумма трех клеток по горизонтали для строк сверху и снизу, двух - для самой строки
+        parity = west ^ east
+        sum0 = parity ^ padded
+        sum1 = (west & east) | (parity & padded)
+        mid0, mid1 = parity[1:-1], (west & east)[1:-1]
+        top0, top1 = sum0[:-2], sum1[:-2]
+        bottom0, bottom1 = sum0[2:], sum1[2:]
+
+        # Младший бит числа соседей и перенос в следующий разряд
+        bit0 = top0 ^ bottom0 ^ mid0
+        carry = (top0 & bottom0) | (mid0 & (top0 ^ bottom0))
+        # Число соседей равно 2 или 3, если ровно одно из top1, bottom1, mid1, carry равно 1
+        pair1, pair2 = top1 ^ bottom1, mid1 ^ carry
+        at_least_two = (top1 & bottom1) | (mid1 & carry) | (pair1 & pair2)
+        two_or_three = (pair1 ^ pair2) & ~at_least_two
+
+        # Клетка живая, если соседей 3 или если соседей 2 и клетка уже была живой
+        np.bitwise_or(bit0, self.words, out=bit0)
+        np.bitwise_and(two_or_three, bit0, out=self.words)
+        if self.nwords:
+            self.words[:, -1] &= self._tail
+        return self
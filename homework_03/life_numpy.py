@@ -0,0 +1,60 @@
+import numpy as np
+
+
+class NumpyBoard:
+    """ Игровое поле в виде массива uint8 (1 - живая клетка, 0 - мертвая).
+    Клетки за краем поля считаются мертвыми, как и в GameOfLife.get_neighbours
+    """
+
+    def __init__(self, nrows: int, ncols: int) -> None:
+        self.nrows = nrows
+        self.ncols = ncols
+        self.cells = np.zeros((nrows, ncols), dtype=np.uint8)
+        # Поле с рамкой из мертвых клеток и буферы, чтобы не выделять память на каждом шаге
+        self._padded = np.zeros((nrows + 2, ncols + 2), dtype=np.uint8)
+        self._counts = np.empty((nrows, ncols), dtype=np.uint8)
+        self._mask = np.empty((nrows, ncols), dtype=bool)
+
+    @classmethod
+    def from_list(cls, clist: list) -> "NumpyBoard":
+        """ Создать поле из списка клеток, представленного в виде матрицы """
+        cells = np.array(clist, dtype=np.uint8)
+        nrows, ncols = cells.shape if cells.size else (len(clist), 0)
+        board = cls(nrows, ncols)
+        board.cells[...] = cells
+        return board
+
+    def to_list(self) -> list:
+        """ Вернуть поле в виде списка списков из 0 и 1 """
+        return self.cells.tolist()
+
+    def to_array(self) -> np.ndarray:
+        """ Вернуть поле в виде массива uint8 (без копирования) """
+        return self.cells
+
+    def __getitem__(self, pos: tuple) -> int:
+        return int(self.cells[pos])
+
+    def __setitem__(self, pos: tuple, state: int) -> None:
+        self.cells[pos] = state
+
+    def population(self) -> int:
+        """ Число живых клеток """
+        return int(np.count_nonzero(self.cells))
+
+    def step(self) -> "NumpyBoard":
+        """ Выполнить один шаг игры: число соседей считается суммой восьми сдвигов поля """
+        padded, counts, mask = self._padded, self._counts, self._mask
+        h, w = self.nrows, self.ncols
+        padded[1:-1, 1:-1] = self.cells
+        np.add(padded[:-2, :-2], padded[:-2, 1:-1], out=counts)
+        for dr, dc in ((0, 2), (1, 0), (1, 2), (2, 0), (2, 1), (2, 2)):
+            counts += padded[dr:dr + h, dc:dc + w]
+        counts += padded[1:-1, 1:-1]
+        # Теперь в counts сумма окрестности 3x3 вместе с самой клеткой: клетка будет живой,
+        # если сумма равна 3 или если сумма равна 4 и клетка живая
+        np.equal(counts, 4, out=mask)
+        mask &= self.cells.view(bool)
+        np.equal(counts, 3, out=self.cells.view(bool))
+        self.cells |= mask
+        return self
@@ -0,0 +1,91 @@
+import numpy as np
+
+
+class SparseBoard:
+    """ Игровое поле, в котором хранятся только живые клетки (номера row * ncols + col).
+    На каждом шаге пересчитываются только клетки рядом с теми, что изменились на
+    предыдущем шаге: остальные клетки измениться не могут, поэтому время шага зависит
+    от активности на поле, а не от его площади.
+    Клетки за краем поля считаются мертвыми, как и в GameOfLife.get_neighbours
+    """
+
+    def __init__(self, nrows: int, ncols: int) -> None:
+        self.nrows = nrows
+        self.ncols = ncols
+        self.live = set()
+        # Клетки, изменившиеся после предыдущего пересчета
+        self.changed = set()
+
+    @classmethod
+    def from_list(cls, clist: list) -> "SparseBoard":
+        """ Создать поле из списка клеток, представленного в виде матрицы """
+        nrows = len(clist)
+        ncols = len(clist[0]) if nrows else 0
+        board = cls(nrows, ncols)
+        board.live = {row * ncols + col for row, line in enumerate(clist)
+                      for col, state in enumerate(line) if state}
+        board.changed = set(board.live)
+        return board
+
+    def to_list(self) -> list:
+        """ Вернуть поле в виде списка списков из 0 и 1 """
+        clist = [[0] * self.ncols for _ in range(self.nrows)]
+        for index in self.live:
+            row, col = divmod(index, self.ncols)
+            clist[row][col] = 1
+        return clist
+
+    def to_array(self) -> np.ndarray:
+        """ Вернуть поле в виде массива uint8 """
+        cells = np.zeros(self.nrows * self.ncols, dtype=np.uint8)
+        cells[np.fromiter(self.live, dtype=np.int64, count=len(self.live))] = 1
+        return cells.reshape(self.nrows, self.ncols)
+
+    def __getitem__(self, pos: tuple) -> int:
+        row, col = pos
+        return int(row * self.ncols + col in self.live)
+
+    def __setitem__(self, pos: tuple, state: int) -> None:
+        row, col = pos
+        index = row * self.ncols + col
+        if bool(state) != (index in self.live):
+            if state:
+                self.live.add(index)
+            else:
+                self.live.discard(index)
+            self.changed.add(index)
+
+    def population(self) -> int:
+        """ Число живых клеток """
+        return len(self.live)
+
+    def neighbourhood(self, index: int) -> list:
+        """ Номера клеток квадрата 3x3 с центром в клетке index, лежащих на поле """
+        ncols = self.ncols
+        row, col = divmod(index, ncols)
+        rows = range(max(row - 1, 0), min(row + 2, self.nrows))
+        cols = range(max(col - 1, 0), min(col + 2, ncols))
+        return [r * ncols + c for r in rows for c in cols]
+
+    def step(self) -> "SparseBoard":
+        """ Выполнить один шаг игры, пересчитав только окрестности изменившихся клеток """
+        live = self.live
+        candidates = set()
+        for index in self.changed:
+            candidates.update(self.neighbourhood(index))
+
+        born, died = [], []
+        for index in candidates:
+            # Сумма окрестности 3x3 вместе с самой клеткой
+            summa = sum(1 for other in self.neighbourhood(index) if other in live)
+            if index in live:
+                if summa != 3 and summa != 4:
+                    died.append(index)
+            elif summa == 3:
+                born.append(index)
+
+        live.difference_update(died)
+        live.update(born)
+        self.changed = set(born)
+        self.changed.update(died)
+        return self
@@ -1,20 +1,22 @@
 import pygame
 from pygame.locals import *
 import random
-import copy
+
+from engines import ENGINES
+from renderer import Renderer
 
 
 class GameOfLife:
 
-    def __init__(self, width=640, height=480, cell_size=10, speed=10) -> None:
+    def __init__(self, width=640, height=480, cell_size=10, speed=10, engine='flat', render='dirty') -> None:
         self.width = width
         self.height = height
         self.cell_size = cell_size
 
         # Устанавливаем размер окна
         self.screen_size = width, height
-        # Создание нового окна
-        self.screen = pygame.display.set_mode(self.screen_size)
+        # Окно создается в run, чтобы игру можно было считать без экрана
+        self.screen = None
 
         # Вычисляем количество ячеек по вертикали и горизонтали
         self.cell_width = self.width // self.cell_size
@@ -23,6 +25,14 @@ class GameOfLife:
         # Скорость протекания игры
         self.speed = speed
 
+        # Хранилище клеток: 'flat' или один из движков ENGINES
+        self.engine = engine
+
+        # Способ отрисовки: 'dirty' - только изменившиеся клетки, 'array' - все поле через surfarray
+        if render not in ('dirty', 'array'):
+            raise ValueError('Unknown render: {}'.format(render))
+        self.render = render
+
     def draw_grid(self) -> None:
         for x in range(0, self.width, self.cell_size):
             pygame.draw.line(self.screen, pygame.Color('black'),
@@ -48,30 +58,49 @@ class GameOfLife:
 
     def run(self) -> None:
         pygame.init()
+        # Создание нового окна
+        self.screen = pygame.display.set_mode(self.screen_size)
         clock = pygame.time.Clock()
         pygame.display.set_caption('Game of Life')
-        self.screen.fill(pygame.Color('white'))
+        renderer = Renderer(self.screen, self.cell_size)
+        draw = renderer.draw if self.render == 'dirty' else renderer.draw_array
 
-        cell_list = CellList(self.cell_height, self.cell_width, randomize=True)
+        cell_list = CellList(self.cell_height, self.cell_width, randomize=True, engine=self.engine)
         running = True
         while running:
             for event in pygame.event.get():
                 if event.type == QUIT:
                     running = False
-            self.draw_grid()
-            self.draw_cell_list(cell_list)
+            pygame.display.update(draw(cell_list.to_list()))
             cell_list.update()
-            pygame.display.flip()
             clock.tick(self.speed)
         pygame.quit()
 
 
 class Cell:
+    """ Клетка поля. Клетка, полученная из CellList, - это представление его состояния:
+    state читает и записывает состояние в хранилище поля, а не в саму клетку
+    """
+    __slots__ = ('row', 'col', '_state', '_owner')
 
-    def __init__(self, row: int, col: int, state=False) -> None:
-        self.state = state
+    def __init__(self, row: int, col: int, state=False, owner: "CellList" = None) -> None:
         self.row = row
         self.col = col
+        self._state = state
+        self._owner = owner
+
+    @property
+    def state(self):
+        if self._owner is not None:
+            return self._owner.get_state(self.row, self.col)
+        return self._state
+
+    @state.setter
+    def state(self, state) -> None:
+        if self._owner is not None:
+            self._owner.set_state(self.row, self.col, state)
+        else:
+            self._state = state
 
     def is_alive(self) -> bool:
         return self.state
@@ -79,38 +108,83 @@ class Cell:
 
 class CellList:
 
-    def __init__(self, nrows: int, ncols: int, randomize=False) -> None:
+    def __init__(self, nrows: int, ncols: int, randomize=False, engine='flat') -> None:
         self.nrows = nrows
         self.ncols = ncols
-        self.grid = []
-        for element in range(nrows):
-            line = []
-            for col_number in range(ncols):
-                if randomize:
-                    line.append(Cell(element, col_number, random.randint(0, 1)))
-                else:
-                    line.append(Cell(element, col_number, False))
-            self.grid.append(line)
+        # По умолчанию состояния клеток хранятся в плоском массиве cells (номер клетки
+        # row * ncols + col), для движков из ENGINES - в поле board
+        if engine != 'flat' and engine not in ENGINES:
+            raise ValueError('Unknown engine: {}'.format(engine))
+        self.engine = engine
+        self.board = None
+        self.cells = None
+        self._neighbours = None
+        if engine != 'flat':
+            self.board = ENGINES[engine](nrows, ncols)
+        else:
+            self.cells = bytearray(nrows * ncols)
+            # Второй буфер, в который записывается следующее поколение
+            self._next = bytearray(nrows * ncols)
+        if randomize:
+            for element in range(nrows):
+                for col_number in range(ncols):
+                    self.set_state(element, col_number, random.randint(0, 1))
+
+    def get_state(self, row: int, col: int) -> int:
+        if self.board is not None:
+            return self.board[row, col]
+        return self.cells[row * self.ncols + col]
+
+    def set_state(self, row: int, col: int, state) -> None:
+        if self.board is not None:
+            self.board[row, col] = int(bool(state))
+        else:
+            self.cells[row * self.ncols + col] = bool(state)
+
+    def to_list(self) -> list:
+        """ Состояния клеток в виде матрицы из 0 и 1 """
+        if self.board is not None:
+            return self.board.to_list()
+        ncols = self.ncols
+        return [list(self.cells[row * ncols:(row + 1) * ncols]) for row in range(self.nrows)]
+
+    def get_cell(self, row: int, col: int) -> Cell:
+        return Cell(row, col, owner=self)
+
+    @property
+    def grid(self) -> list:
+        """ Клетки поля в виде матрицы """
+        return [[Cell(row, col, owner=self) for col in range(self.ncols)] for row in range(self.nrows)]
+
+    @property
+    def neighbours(self) -> list:
+        """ Номера соседей каждой клетки, вычисляются один раз для поля """
+        if self._neighbours is None:
+            nrows, ncols = self.nrows, self.ncols
+            self._neighbours = [
+                [r * ncols + c
+                 for r in range(max(row - 1, 0), min(row + 2, nrows))
+                 for c in range(max(col - 1, 0), min(col + 2, ncols))
+                 if r != row or c != col]
+                for row in range(nrows) for col in range(ncols)]
+        return self._neighbours
 
     def get_neighbours(self, cell: Cell) -> list:
-        neighbours = []
-        col, row = cell.col, cell.row
-        for element in range(row - 1, row + 2):
-            for col_number in range(col - 1, col + 2):
-                if element in range(0, self.nrows) and col_number in range(0, self.ncols) \
-                        and (col_number != col or element != row):
-                    neighbours.append(self.grid[element][col_number])
-        return neighbours
+        ncols = self.ncols
+        return [Cell(index // ncols, index % ncols, owner=self)
+                for index in self.neighbours[cell.row * ncols + cell.col]]
 
     def update(self):
-        new_clist = copy.deepcopy(self.grid)
-        for cell in self:
-            summa = sum(i.is_alive() for i in self.get_neighbours(cell))
-            if summa != 2 and summa != 3:
-                new_clist[cell.row][cell.col].state = False
-            elif summa == 3:
-                new_clist[cell.row][cell.col].state = True
-        self.grid = new_clist
+        if self.board is not None:
+            self.board.step()
+            return self
+        cells, new = self.cells, self._next
+        for index, around in enumerate(self.neighbours):
+            summa = 0
+            for other in around:
+                summa += cells[other]
+            new[index] = summa == 3 or (summa == 2 and cells[index])
+        self.cells, self._next = new, cells
         return self
 
     def __iter__(self):
@@ -119,7 +193,7 @@ class CellList:
 
     def __next__(self) -> Cell:
         if self.element < self.nrows:
-            cell = self.grid[self.element][self.col_number]
+            cell = Cell(self.element, self.col_number, owner=self)
             self.col_number += 1
             if self.col_number == self.ncols:
                 self.element += 1
@@ -132,7 +206,7 @@ class CellList:
         string = ''
         for row_number in range(0, self.nrows):
             for col_number in range(0, self.ncols):
-                if self.grid[row_number][col_number].state:
+                if self.get_state(row_number, col_number):
                     string += '1 '
                 else:
                     string += '0 '
@@ -140,31 +214,26 @@ class CellList:
         return string
 
     @classmethod
-    def from_file(cls, filename: str) -> "CellList":
+    def from_list(cls, clist: list, engine='flat') -> "CellList":
+        """ Создать поле из списка состояний клеток, представленного в виде матрицы """
+        nrows = len(clist)
+        ncols = len(clist[0]) if nrows else 0
+        cell_list = cls(nrows, ncols, False, engine)
+        if engine != 'flat':
+            cell_list.board = ENGINES[engine].from_list(clist)
+        else:
+            cell_list.cells[:] = bytes(int(bool(state)) for line in clist for state in line)
+        return cell_list
+
+    @classmethod
+    def from_file(cls, filename: str, engine='flat') -> "CellList":
         with open(filename, 'r') as f:
             grid = []
-            row = 0
-            col = 0
-            ncol = 0
             for lenght in f:
-                line = []
-                for element in lenght:
-                    if element == '0':
-                        line.append(Cell(row, col, False))
-                    if element == '1':
-                        line.append(Cell(row, col, True))
-                    col += 1
-                ncol = col
-                col = 0
-                grid.append(line)
-            for line in grid:
-                for cell in line:
-                    cell.row = row
-                row += 1
-
-            cell_list = CellList(row, ncol, False)
-            cell_list.grid = grid
-            return cell_list
+                line = [int(element) for element in lenght if element in '01']
+                if line:
+                    grid.append(line)
+            return cls.from_list(grid, engine)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,92 @@
+import numpy as np
+import pygame
+
+
+class Renderer:
+    """ Отрисовка поля на экране. Сетка рисуется один раз на отдельной поверхности,
+    а на каждом кадре перерисовываются только клетки, изменившиеся с прошлого кадра.
+    Методы draw и draw_array возвращают прямоугольники для pygame.display.update
+    """
+
+    def __init__(self, screen: pygame.Surface, cell_size: int, alive_color='green',
+                 dead_color='white', line_color='black') -> None:
+        self.screen = screen
+        self.cell_size = cell_size
+        self.alive_color = pygame.Color(alive_color)
+        self.dead_color = pygame.Color(dead_color)
+        self.line_color = pygame.Color(line_color)
+        width, height = screen.get_size()
+        self.nrows = height // cell_size
+        self.ncols = width // cell_size
+
+        # Пустое поле с сеткой
+        self.background = pygame.Surface((width, height), 0, screen)
+        self.background.fill(self.dead_color)
+        for x in range(0, width, cell_size):
+            pygame.draw.line(self.background, self.line_color, (x, 0), (x, height))
+        for y in range(0, height, cell_size):
+            pygame.draw.line(self.background, self.line_color, (0, y), (width, y))
+
+        # Состояние поля на прошлом кадре (None - экран еще не нарисован)
+        self.previous = None
+        self._board_surface = None
+        self._lines = None
+
+    def reset(self) -> None:
+        """ Нарисовать поле заново на следующем кадре """
+        self.previous = None
+
+    def _cell_rect(self, row: int, col: int) -> pygame.Rect:
+        return pygame.Rect(col * self.cell_size + 1, row * self.cell_size + 1,
+                           self.cell_size - 1, self.cell_size - 1)
+
+    def draw(self, clist) -> list:
+        """ Отрисовать поле, перерисовав только изменившиеся клетки
+        :param clist: поле в виде матрицы из 0 и 1 (список списков или массив)
+        :return: список изменившихся прямоугольников экрана
+        """
+        cells = np.asarray(clist, dtype=bool)[:self.nrows, :self.ncols]
+        if self.previous is None or self.previous.shape != cells.shape:
+            self.screen.blit(self.background, (0, 0))
+            changed = cells
+            rects = [self.screen.get_rect()]
+        else:
+            changed = cells != self.previous
+            rects = None
+
+        rows, cols = np.nonzero(changed)
+        alive = cells[rows, cols].tolist()
+        dirty = []
+        for row, col, state in zip(rows.tolist(), cols.tolist(), alive):
+            rect = self._cell_rect(row, col)
+            self.screen.fill(self.alive_color if state else self.dead_color, rect)
+            dirty.append(rect)
+        self.previous = cells.copy()
+        # Если изменилась большая часть поля, дешевле обновить экран целиком
+        if rects is None and len(dirty) > cells.size // 4:
+            rects = [self.screen.get_rect()]
+        return rects if rects is not None else dirty
+
+    def draw_array(self, clist) -> list:
+        """ Отрисовать все поле одним blit: изображение строится из массива через surfarray
+        :param clist: поле в виде матрицы из 0 и 1 (список списков или массив)
+        :return: список из одного прямоугольника с полем
+        """
+        cells = np.asarray(clist, dtype=bool)[:self.nrows, :self.ncols]
+        size = self.cell_size
+        if self._board_surface is None:
+            width, height = self.ncols * size, self.nrows * size
+            self._board_surface = pygame.Surface((width, height), 0, self.screen)
+            x, y = np.ogrid[:width, :height]
+            self._lines = (x % size == 0) | (y % size == 0)
+        surface = self._board_surface
+        if self.previous is None:
+            self.screen.blit(self.background, (0, 0))
+
+        # Массивы surfarray индексируются как [x, y], поэтому поле транспонируется
+        pixels = np.repeat(np.repeat(cells.T, size, axis=0), size, axis=1)
+        colors = np.where(pixels, surface.map_rgb(self.alive_color), surface.map_rgb(self.dead_color))
+        colors[self._lines] = surface.map_rgb(self.line_color)
+        pygame.surfarray.blit_array(surface, colors)
+        self.previous = cells.copy()
+        return [self.screen.blit(surface, (0, 0))]
@@ -2,7 +2,12 @@ import unittest
 import random
 import json
 
+import pygame
+
 from life import GameOfLife
+from engines import ENGINES
+from headless import HEADLESS_ENGINES, simulate
+from renderer import Renderer
 
 
 class TestGameOfLife(unittest.TestCase):
@@ -108,6 +113,93 @@ class TestGameOfLife(unittest.TestCase):
                     num_updates += 1
                 self.assertEqual(steps[step], game.clist)
 
+    def test_can_update_with_engines(self):
+        with open('steps.txt') as f:
+            steps = json.load(f)
+
+        for engine in ENGINES:
+            game = GameOfLife(width=self.width, height=self.height, cell_size=1, engine=engine)
+            game.clist = self.clist
+            num_updates = 0
+            for step in sorted(steps.keys(), key=int):
+                with self.subTest(engine=engine, step=step):
+                    for _ in range(int(step)-num_updates):
+                        game.clist = game.update_cell_list(game.clist)
+                        num_updates += 1
+                    self.assertEqual(steps[step], game.clist)
+
+    def test_step_keeps_engine_board(self):
+        with open('steps.txt') as f:
+            steps = json.load(f)
+
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                game = GameOfLife(width=self.width, height=self.height, cell_size=1, engine=engine)
+                game.clist = self.clist
+                board = game.board
+                num_updates = 0
+                for step in sorted(steps.keys(), key=int):
+                    for _ in range(int(step)-num_updates):
+                        game.step()
+                        num_updates += 1
+                    self.assertIs(board, game.board)
+                    self.assertEqual(steps[step], game.clist)
+                    self.assertEqual(steps[step], game.cells().tolist())
+
+    def test_update_sees_grid_changed_in_place(self):
+        for engine in ['list'] + list(ENGINES):
+            with self.subTest(engine=engine):
+                game = GameOfLife(width=5, height=5, cell_size=1, engine=engine)
+                clist = game.cell_list(randomize=False)
+                clist[2][1] = clist[2][2] = clist[2][3] = 1
+                clist = game.update_cell_list(clist)
+                self.assertEqual([0, 1, 1, 1, 0], [row[2] for row in clist])
+                clist[1][2] = clist[3][2] = 0
+                clist = game.update_cell_list(clist)
+                self.assertEqual(0, sum(map(sum, clist)))
+
+    def test_sparse_engine_keeps_changed_cells(self):
+        game = GameOfLife(width=200, height=200, cell_size=1, engine='sparse')
+        clist = game.cell_list(randomize=False)
+        clist[100][99] = clist[100][100] = clist[100][101] = 1
+        game.clist = clist
+
+        for _ in range(3):
+            game.step()
+            # Мигалка: на каждом шаге меняются только четыре клетки по краям
+            self.assertEqual(4, len(game.board.changed))
+            self.assertEqual(3, game.board.population())
+
+    def test_headless_engines_agree(self):
+        with open('steps.txt') as f:
+            steps = json.load(f)
+        last = max(map(int, steps))
+
+        for engine in HEADLESS_ENGINES:
+            with self.subTest(engine=engine):
+                snapshots = dict(simulate(self.clist, last, engine, every=1))
+                for step, clist in steps.items():
+                    if int(step):
+                        self.assertEqual(clist, snapshots[int(step)])
+
+    def test_renderers_draw_the_same_picture(self):
+        game = GameOfLife(width=self.width * 5, height=self.height * 5, cell_size=5)
+        game.screen = pygame.Surface(game.screen_size)
+        dirty = Renderer(pygame.Surface(game.screen_size), 5)
+        array = Renderer(pygame.Surface(game.screen_size), 5)
+
+        game.clist = self.clist
+        for _ in range(3):
+            game.screen.fill(pygame.Color('white'))
+            game.draw_grid()
+            game.draw_cell_list(game.clist)
+            dirty.draw(game.clist)
+            array.draw_array(game.clist)
+            expected = pygame.image.tobytes(game.screen, 'RGB')
+            self.assertEqual(expected, pygame.image.tobytes(dirty.screen, 'RGB'))
+            self.assertEqual(expected, pygame.image.tobytes(array.screen, 'RGB'))
+            game.clist = game.update_cell_list(game.clist)
+
 
 loader = unittest.TestLoader()
 suite = loader.loadTestsFromTestCase(TestGameOfLife)
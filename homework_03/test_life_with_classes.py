@@ -3,6 +3,8 @@ import random
 import json
 
 from life_with_classes import Cell, CellList
+from engines import ENGINES
+import hashlife
 
 
 class TestCell(unittest.TestCase):
@@ -139,6 +141,33 @@ class TestCellList(unittest.TestCase):
                         row = []
                 self.assertEqual(steps[step], states)
 
+    def test_can_update_with_engines(self):
+        with open('steps.txt') as f:
+            steps = json.load(f)
+
+        for engine in ENGINES:
+            clist = CellList.from_file('grid.txt', engine=engine)
+            num_updates = 0
+            for step in sorted(steps.keys(), key=int):
+                with self.subTest(engine=engine, step=step):
+                    for _ in range(int(step)-num_updates):
+                        clist = clist.update()
+                        num_updates += 1
+                    states = [int(cell.is_alive()) for cell in clist]
+                    self.assertEqual(steps[step], [states[i:i + clist.ncols] for i in range(0, len(states), clist.ncols)])
+
+    def test_hashlife_advance(self):
+        clist = CellList(nrows=6, ncols=6, randomize=False)
+        for row, col in [(0, 1), (1, 2), (2, 0), (2, 1), (2, 2)]:
+            clist.grid[row][col].state = True
+        # Через 4 поколения глайдер сдвигается на одну клетку вниз и вправо,
+        # а через 4000 - на 1000 клеток, за пределы исходного поля
+        moved = hashlife.advance(clist, 4)
+        self.assertEqual([(1, 2), (2, 3), (3, 1), (3, 2), (3, 3)],
+                         [(cell.row, cell.col) for cell in moved if cell.is_alive()])
+        far = hashlife.advance(clist, 4000, window=(1000, 1000, 3, 3))
+        self.assertEqual([0, 1, 0, 0, 0, 1, 1, 1, 1], [int(cell.is_alive()) for cell in far])
+
 
 loader = unittest.TestLoader()
 suite = loader.loadTestsFromTestCase(TestCell)
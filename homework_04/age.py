@@ -2,7 +2,7 @@ import datetime
 from statistics import median
 from typing import Optional
 
-from api import get_friends
+from api import get_friends, use_cache
 import config
 
 
@@ -42,6 +42,7 @@ def age_predict(user_id: int) -> Optional[float]:
 
 
 if __name__ == '__main__':
+    use_cache()
     user_id = config.VK_CONFIG['user_id']
     print('Age:', age_predict(user_id))
 
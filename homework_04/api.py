@@ -1,25 +1,184 @@
+import json
+import random
+import threading
 import requests
 import time
+from collections import deque
 import config
+from api_cache import ResponseCache, is_cacheable
 
+# VK разрешает не больше трех запросов в секунду с одним токеном
+RATE_LIMIT = 3
+# HTTP-статусы, после которых запрос имеет смысл повторить
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# Коды ошибок VK, после которых запрос имеет смысл повторить:
+# неизвестная ошибка, слишком много запросов в секунду, внутренняя ошибка сервера
+RETRYABLE_ERROR_CODES = {1, 6, 10}
+# Максимальное число вызовов API в одном запросе execute
+EXECUTE_BATCH_SIZE = 25
 
-def get(url: str, params={}, timeout=1, max_retries=5, backoff_factor=0.3) -> dict:
-    """ Выполнить GET-запрос
+
+class VKAPIError(Exception):
+    """ Ошибка, которую вернул VK API """
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class SlidingWindow:
+    """ Окно последних запросов: не больше capacity запросов за любые capacity / rate секунд.
+    При capacity = rate это ровно ограничение VK - не больше rate запросов за любую секунду,
+    при capacity = 1 запросы идут равномерно, через 1 / rate секунд.
+    Окно не ждет и не блокируется само, это делают ограничители поверх него
+    """
+
+    def __init__(self, rate: float = RATE_LIMIT, capacity: int = None) -> None:
+        self.capacity = capacity or max(1, int(rate))
+        self.period = self.capacity / rate
+        self.sent = deque()
+
+    def reserve(self, now: float) -> float:
+        """ Записать запрос в момент now, если окно это позволяет
+        :return: 0, если запрос записан, иначе сколько секунд нужно подождать
+        """
+        while self.sent and now - self.sent[0] >= self.period:
+            self.sent.popleft()
+        if len(self.sent) < self.capacity:
+            self.sent.append(now)
+            return 0.0
+        return self.sent[0] + self.period - now
+
+
+class RateLimiter:
+    """ Ограничение частоты запросов для потоков, см. SlidingWindow """
+
+    def __init__(self, rate: float = RATE_LIMIT, capacity: int = None) -> None:
+        self.window = SlidingWindow(rate, capacity)
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """ Дождаться, пока окно позволит отправить запрос, и занять в нем место """
+        with self.lock:
+            delay = self.window.reserve(time.monotonic())
+            while delay > 0:
+                time.sleep(delay)
+                delay = self.window.reserve(time.monotonic())
+
+
+class VKClient:
+    """ Клиент VK API: одна сессия с постоянными соединениями, общий для всех запросов
+    ограничитель частоты и повторы только после ошибок, которые могут пройти сами
+    """
+
+    def __init__(self, access_token: str = None, version: str = None, domain: str = None,
+                 timeout=1, max_retries=5, backoff_factor=0.3, jitter=0.1,
+                 session: requests.Session = None, limiter: RateLimiter = None,
+                 cache: ResponseCache = None) -> None:
+        """
+        :param timeout: максимальное время ожидания ответа от сервера
+        :param max_retries: максимальное число попыток
+        :param backoff_factor: коэффициент экспоненциального нарастания задержки
+        :param jitter: доля задержки, на которую она случайно увеличивается
+        :param session: сессия requests, которую можно разделить между клиентами
+        :param limiter: ограничитель частоты, который можно разделить между клиентами
+        :param cache: кэш ответов методов (None - без кэша)
+        """
+        self.access_token = access_token or config.VK_CONFIG['access_token']
+        self.version = version or config.VK_CONFIG['version']
+        self.domain = domain or config.VK_CONFIG['domain']
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+        self.session = session or requests.Session()
+        self.limiter = limiter or RateLimiter()
+        self.cache = cache
+
+    def backoff(self, attempt: int) -> None:
+        """ Подождать перед повторной попыткой с номером attempt + 1 """
+        delay = self.backoff_factor * (2 ** attempt)
+        time.sleep(delay * (1 + random.uniform(0, self.jitter)))
+
+    def get(self, url: str, params: dict = None) -> requests.Response:
+        """ Выполнить GET-запрос, повторяя его после обрыва соединения, таймаута,
+        ответа 429 и ошибок сервера. Остальные исключения не перехватываются
+        :param url: адрес, на который необходимо выполнить запрос
+        :param params: параметры запроса
+        """
+        for i in range(self.max_retries):
+            self.limiter.acquire()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if i == self.max_retries - 1:
+                    raise
+            else:
+                if response.status_code not in RETRYABLE_STATUSES:
+                    return response
+                if i == self.max_retries - 1:
+                    response.raise_for_status()
+            self.backoff(i)
+
+    def call(self, method: str, **params):
+        """ Вызвать метод VK API
+        :param method: название метода, например 'friends.get'
+        :param params: параметры метода
+        :return: поле response ответа
+        """
+        return self._call(method, params)['response']
+
+    def execute(self, code: str) -> tuple:
+        """ Выполнить код VKScript методом execute
+        :param code: код, например 'return [API.users.get({"user_ids": 1})];'
+        :return: поле response ответа и список ошибок вызовов внутри кода (поле execute_errors)
+        """
+        json_file = self._call('execute', {'code': code})
+        return json_file['response'], json_file.get('execute_errors', [])
+
+    def _call(self, method: str, params: dict) -> dict:
+        """ Вызвать метод VK API и вернуть ответ без ошибки целиком """
+        query_params = dict(params, access_token=self.access_token, v=self.version)
+        if self.cache is not None:
+            found, response = self.cache.get(method, query_params)
+            if found:
+                return {'response': response}
+        for i in range(self.max_retries):
+            json_file = self.get('{}/{}'.format(self.domain, method), query_params).json()
+            fail = json_file.get('error')
+            if not fail:
+                if self.cache is not None and is_cacheable(method, json_file):
+                    self.cache.set(method, query_params, json_file['response'])
+                return json_file
+            if fail['error_code'] not in RETRYABLE_ERROR_CODES or i == self.max_retries - 1:
+                raise VKAPIError(fail['error_code'], fail['error_msg'])
+            self.backoff(i)
+
+
+client = VKClient()
+
+
+def use_cache(path: str = 'vk_cache.sqlite', **kwargs) -> ResponseCache:
+    """ Включить кэш ответов для функций этого модуля
+    :param path: файл базы SQLite
+    :param kwargs: параметры ResponseCache (ttls, max_entries, offline, any_token)
+    """
+    client.cache = ResponseCache(path, **kwargs)
+    return client.cache
+
+
+def get(url: str, params={}, timeout=1, max_retries=5, backoff_factor=0.3) -> requests.Response:
+    """ Выполнить GET-запрос через общую сессию и ограничитель частоты
     :param url: адрес, на который необходимо выполнить запрос
     :param params: параметры запроса
     :param timeout: максимальное время ожидания ответа от сервера
     :param max_retries: максимальное число повторных запросов
     :param backoff_factor: коэффициент экспоненциального нарастания задержки
     """
-    for i in range(max_retries):
-        try:
-            req = requests.get(url, params=params, timeout=timeout)
-            return req
-        except requests.exceptions.RequestException:
-            if i == max_retries - 1:
-                raise
-            value = backoff_factor * (2 ** i)
-            time.sleep(value)
+    request_client = VKClient(timeout=timeout, max_retries=max_retries, backoff_factor=backoff_factor,
+                              session=client.session, limiter=client.limiter)
+    return request_client.get(url, params)
 
 
 def get_friends(user_id: int, fields="") -> dict:
@@ -31,22 +190,53 @@ def get_friends(user_id: int, fields="") -> dict:
     assert isinstance(fields, str), "fields must be string"
     assert user_id > 0, "user_id must be positive integer"
 
-    query_params = {
-        'domain': config.VK_CONFIG['domain'],
-        'access_token': config.VK_CONFIG['access_token'],
-        'user_id': user_id,
-        'fields': fields,
-        'v': config.VK_CONFIG['version']
-    }
+    response = client.call('friends.get', user_id=user_id, fields=fields)
+    return response['items']
 
-    query = "{domain}/friends.get?access_token={access_token}&user_id={user_id}&fields={fields}&v={v}".format(
-        **query_params)
-    response = get(query, query_params)
-    json_file = response.json()
-    fail = json_file.get('error')
-    if fail:
-        raise Exception(json_file['error']['error_msg'])
-    return json_file['response']['items']
+
+def get_friends_many(user_ids: list, fields="", errors: dict = None) -> dict:
+    """ Вернуть друзей сразу нескольких пользователей: вызовы friends.get собираются
+    в запросы execute по EXECUTE_BATCH_SIZE штук. Вызовы, завершившиеся ошибкой
+    из RETRYABLE_ERROR_CODES, повторяются следующими запросами execute (всего не больше
+    client.max_retries попыток)
+    :param user_ids: идентификаторы пользователей
+    :param fields: список полей, которые нужно получить для каждого пользователя
+    :param errors: словарь, в который записываются ошибки: идентификатор -> VKAPIError
+                   (например, с кодом 30 для закрытого профиля)
+    :return: словарь идентификатор -> список друзей; пользователи, для которых VK вернул
+             ошибку, в словарь не попадают
+    """
+    assert isinstance(fields, str), "fields must be string"
+
+    pending = list(user_ids)
+    friends = {}
+    failed = {}
+    for attempt in range(client.max_retries):
+        retry = []
+        for start in range(0, len(pending), EXECUTE_BATCH_SIZE):
+            batch = pending[start:start + EXECUTE_BATCH_SIZE]
+            calls = ['API.friends.get({})'.format(json.dumps({'user_id': user_id, 'fields': fields}))
+                     for user_id in batch]
+            response, execute_errors = client.execute('return [{}];'.format(','.join(calls)))
+            # На месте вызова, который завершился ошибкой, execute возвращает false,
+            # а сами ошибки в том же порядке перечислены в execute_errors
+            batch_errors = iter(execute_errors)
+            for user_id, result in zip(batch, response):
+                if isinstance(result, dict):
+                    friends[user_id] = result['items']
+                    failed.pop(user_id, None)
+                    continue
+                fail = next(batch_errors, {'error_code': 1, 'error_msg': 'Unknown error'})
+                failed[user_id] = VKAPIError(fail['error_code'], fail['error_msg'])
+                if fail['error_code'] in RETRYABLE_ERROR_CODES:
+                    retry.append(user_id)
+        if not retry or attempt == client.max_retries - 1:
+            break
+        pending = retry
+        client.backoff(attempt)
+    if errors is not None:
+        errors.update(failed)
+    return friends
 
 
 def messages_get_history(user_id: int, offset=0, count=200) -> list:
@@ -60,29 +250,15 @@ def messages_get_history(user_id: int, offset=0, count=200) -> list:
     assert isinstance(offset, int), "offset must be positive integer"
     assert offset >= 0, "user_id must be positive integer"
     assert count >= 0, "user_id must be positive integer"
-    query_params = {
-        'domain': config.VK_CONFIG['domain'],
-        'access_token': config.VK_CONFIG['access_token'],
-        'user_id': user_id,
-        'offset': offset,
-        'messages_count': min(count, 200),
-        'v': config.VK_CONFIG['version']
-    }
 
     messages = []
     while count > 0:
-        query = "{domain}/messages.getHistory?" \
-            "access_token={access_token}&user_id={user_id}&offset={offset}&count={messages_count}&v={v}"\
-            .format(**query_params)
-        response = get(query)
-        if response:
-            json_file = response.json()
-            if json_file.get('error') is not None:
-                print(json_file['error']['error_msg'])
-            else:
-                messages.extend(json_file['response']["items"])
+        try:
+            response = client.call('messages.getHistory', user_id=user_id, offset=offset, count=min(count, 200))
+        except VKAPIError as error:
+            print(error.message)
+        else:
+            messages.extend(response["items"])
         count -= min(count, 200)
-        query_params['offset'] += 200
-        query_params['messages_count'] = min(count, 200)
-        time.sleep(0.4)
+        offset += 200
     return messages
@@ -0,0 +1,185 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import AsyncIterator
+
+import aiohttp
+
+import config
+from api import RATE_LIMIT, RETRYABLE_ERROR_CODES, RETRYABLE_STATUSES, SlidingWindow, VKAPIError
+from api_cache import ResponseCache, is_cacheable
+
+# Максимальное число сообщений, которое возвращает messages.getHistory за один запрос
+HISTORY_PAGE_SIZE = 200
+
+
+class AsyncRateLimiter:
+    """ Ограничение частоты запросов для asyncio, см. SlidingWindow """
+
+    def __init__(self, rate: float = RATE_LIMIT, capacity: int = None) -> None:
+        self.window = SlidingWindow(rate, capacity)
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """ Дождаться, пока окно позволит отправить запрос, и занять в нем место """
+        async with self.lock:
+            delay = self.window.reserve(time.monotonic())
+            while delay > 0:
+                await asyncio.sleep(delay)
+                delay = self.window.reserve(time.monotonic())
+
+
+class AsyncVKClient:
+    """ Асинхронный клиент VK API. Используется как асинхронный контекстный менеджер:
+    async with AsyncVKClient() as client: ...
+    """
+
+    def __init__(self, access_token: str = None, version: str = None, domain: str = None,
+                 timeout=1, max_retries=5, backoff_factor=0.3, jitter=0.1,
+                 rate: float = RATE_LIMIT, window: int = RATE_LIMIT, cache: ResponseCache = None) -> None:
+        """
+        :param timeout: максимальное время ожидания ответа от сервера
+        :param max_retries: максимальное число попыток
+        :param backoff_factor: коэффициент экспоненциального нарастания задержки
+        :param jitter: доля задержки, на которую она случайно увеличивается
+        :param rate: число запросов в секунду
+        :param window: сколько страниц истории загружается одновременно
+        :param cache: кэш ответов методов (None - без кэша)
+        """
+        self.access_token = access_token or config.VK_CONFIG['access_token']
+        self.version = version or config.VK_CONFIG['version']
+        self.domain = domain or config.VK_CONFIG['domain']
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+        self.rate = rate
+        self.window = window
+        self.cache = cache
+        self.session = None
+        self.limiter = None
+
+    async def __aenter__(self) -> "AsyncVKClient":
+        self.session = aiohttp.ClientSession(timeout=self.timeout)
+        self.limiter = AsyncRateLimiter(self.rate)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.session.close()
+
+    async def backoff(self, attempt: int) -> None:
+        """ Подождать перед повторной попыткой с номером attempt + 1 """
+        delay = self.backoff_factor * (2 ** attempt)
+        await asyncio.sleep(delay * (1 + random.uniform(0, self.jitter)))
+
+    async def get(self, url: str, params: dict = None) -> dict:
+        """ Выполнить GET-запрос и вернуть разобранный JSON, повторяя запрос после обрыва
+        соединения, таймаута, ответа 429 и ошибок сервера
+        :param url: адрес, на который необходимо выполнить запрос
+        :param params: параметры запроса
+        """
+        for i in range(self.max_retries):
+            await self.limiter.acquire()
+            try:
+                async with self.session.get(url, params=params) as response:
+                    if response.status not in RETRYABLE_STATUSES:
+                        response.raise_for_status()
+                        return await response.json(content_type=None)
+                    if i == self.max_retries - 1:
+                        response.raise_for_status()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if i == self.max_retries - 1:
+                    raise
+            await self.backoff(i)
+
+    async def call(self, method: str, **params):
+        """ Вызвать метод VK API
+        :param method: название метода, например 'friends.get'
+        :param params: параметры метода
+        :return: поле response ответа
+        """
+        query_params = dict(params, access_token=self.access_token, v=self.version)
+        # Запросы к SQLite блокируют поток, поэтому выполняются вне цикла событий
+        if self.cache is not None:
+            found, response = await asyncio.to_thread(self.cache.get, method, query_params)
+            if found:
+                return response
+        for i in range(self.max_retries):
+            json_file = await self.get('{}/{}'.format(self.domain, method), query_params)
+            fail = json_file.get('error')
+            if not fail:
+                if self.cache is not None and is_cacheable(method, json_file):
+                    await asyncio.to_thread(self.cache.set, method, query_params, json_file['response'])
+                return json_file['response']
+            if fail['error_code'] not in RETRYABLE_ERROR_CODES or i == self.max_retries - 1:
+                raise VKAPIError(fail['error_code'], fail['error_msg'])
+            await self.backoff(i)
+
+    async def get_friends(self, user_id: int, fields="") -> list:
+        """ Вернуть данные о друзьях пользователя
+        :param user_id: идентификатор пользователя, список друзей которого нужно получить
+        :param fields: список полей, которые нужно получить для каждого пользователя
+        """
+        assert isinstance(user_id, int), "user_id must be positive integer"
+        assert isinstance(fields, str), "fields must be string"
+        assert user_id > 0, "user_id must be positive integer"
+
+        response = await self.call('friends.get', user_id=user_id, fields=fields)
+        return response['items']
+
+    async def messages_get_history(self, user_id: int, offset=0, count=None) -> AsyncIterator[dict]:
+        """ Получать сообщения переписки с указанным пользователем по мере загрузки.
+        После первой страницы известно, сколько всего сообщений, и следующие страницы
+        загружаются одновременно (не больше window страниц), а сообщения выдаются по порядку
+        :param user_id: идентификатор пользователя, с которым нужно получить историю переписки
+        :param offset: смещение в истории переписки
+        :param count: число сообщений, которое нужно получить (None - вся история после offset)
+        """
+        assert isinstance(user_id, int), "user_id must be positive integer"
+        assert user_id > 0, "user_id must be positive integer"
+        assert isinstance(offset, int), "offset must be positive integer"
+        assert offset >= 0, "offset must be positive integer"
+        assert count is None or count >= 0, "count must be positive integer"
+
+        def page(page_offset: int, page_count: int):
+            return self.call('messages.getHistory', user_id=user_id, offset=page_offset, count=page_count)
+
+        first = await page(offset, HISTORY_PAGE_SIZE if count is None else min(count, HISTORY_PAGE_SIZE))
+        end = offset + count if count is not None else first['count']
+        for message in first['items']:
+            yield message
+
+        offsets = iter(range(offset + HISTORY_PAGE_SIZE, end, HISTORY_PAGE_SIZE))
+        pending = deque()
+        try:
+            for page_offset in offsets:
+                pending.append(asyncio.ensure_future(page(page_offset, min(HISTORY_PAGE_SIZE, end - page_offset))))
+                if len(pending) >= self.window:
+                    break
+            while pending:
+                response = await pending.popleft()
+                for page_offset in offsets:
+                    pending.append(asyncio.ensure_future(page(page_offset, min(HISTORY_PAGE_SIZE, end - page_offset))))
+                    break
+                for message in response['items']:
+                    yield message
+        finally:
+            # Если потребитель прервал чтение, незагруженные страницы отменяются и дожидаются,
+            # чтобы не осталось задач, уничтоженных в состоянии pending
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def get_friends(user_id: int, fields="") -> list:
+    """ Вернуть данные о друзьях пользователя через временный клиент """
+    async with AsyncVKClient() as client:
+        return await client.get_friends(user_id, fields)
+
+
+async def messages_get_history(user_id: int, offset=0, count=None) -> AsyncIterator[dict]:
+    """ Получать сообщения переписки через временный клиент """
+    async with AsyncVKClient() as client:
+        async for message in client.messages_get_history(user_id, offset, count):
+            yield message
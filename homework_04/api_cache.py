@@ -0,0 +1,134 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+# Сколько секунд ответ метода считается свежим
+DEFAULT_TTLS = {
+    'friends.get': 24 * 60 * 60,
+    'execute': 24 * 60 * 60,
+    'messages.getHistory': 10 * 60,
+}
+DEFAULT_TTL = 60 * 60
+# Параметры, которые не входят в запрос; токен учитывается в ключе отдельно, в виде хэша,
+# потому что ответы вроде messages.getHistory зависят от владельца токена
+IGNORED_PARAMS = {'access_token'}
+
+
+def is_cacheable(method: str, json_file: dict) -> bool:
+    """ Можно ли сохранить ответ в кэш. Ответ execute, в котором часть вызовов завершилась
+    ошибкой (false на месте результата или поле execute_errors), не сохраняется: иначе временная
+    ошибка весь срок TTL воспроизводилась бы из кэша
+    """
+    if method != 'execute':
+        return True
+    response = json_file.get('response')
+    if 'execute_errors' in json_file or response is False:
+        return False
+    return not (isinstance(response, list) and any(result is False for result in response))
+
+
+class CacheMiss(Exception):
+    """ Ответа нет в кэше, а запросы в сеть запрещены """
+
+
+class ResponseCache:
+    """ Кэш ответов VK API в базе SQLite. Ключ - название метода, параметры запроса
+    и хэш токена, так что ответы одного аккаунта не достаются другому. Устаревшие по TTL
+    ответы не используются, а при превышении max_entries удаляются ответы, к которым
+    дольше всего не обращались.
+    В режиме offline кэш только воспроизводит записанные ответы независимо от их возраста;
+    с any_token=True - в том числе ответы, записанные с другим токеном
+    """
+
+    def __init__(self, path: str = 'vk_cache.sqlite', ttls: dict = None, default_ttl: float = DEFAULT_TTL,
+                 max_entries: int = 10000, offline: bool = False, any_token: bool = False) -> None:
+        if any_token and not offline:
+            raise ValueError('any_token is only allowed in offline mode')
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.offline = offline
+        self.any_token = any_token
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        columns = [row[1] for row in self.connection.execute('PRAGMA table_info(responses)')]
+        if columns and 'request' not in columns:
+            # Ответы, записанные без учета токена, могут принадлежать другому аккаунту
+            self.connection.execute('DROP TABLE responses')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'key TEXT PRIMARY KEY, request TEXT, method TEXT, response TEXT, created REAL, accessed REAL)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS responses_request ON responses (request)')
+        self.connection.commit()
+
+    @staticmethod
+    def make_request(method: str, params: dict) -> str:
+        """ Запрос без токена: метод и отсортированные параметры """
+        normalized = {name: str(value) for name, value in params.items() if name not in IGNORED_PARAMS}
+        return method + '?' + json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+
+    @classmethod
+    def make_key(cls, method: str, params: dict) -> str:
+        """ Ключ ответа: запрос и хэш токена """
+        token = hashlib.sha256(str(params.get('access_token', '')).encode()).hexdigest()
+        return cls.make_request(method, params) + '#' + token
+
+    def get(self, method: str, params: dict) -> tuple:
+        """ Найти ответ в кэше
+        :return: (True, ответ), если свежий ответ есть в кэше, иначе (False, None)
+        """
+        key = self.make_key(method, params)
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute('SELECT response, created FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None and self.any_token:
+                row = self.connection.execute(
+                    'SELECT response, created, key FROM responses WHERE request = ? ORDER BY accessed DESC LIMIT 1',
+                    (self.make_request(method, params),)).fetchone()
+                if row is not None:
+                    key = row[2]
+            if row is None or (not self.offline and now - row[1] > self.ttls.get(method, self.default_ttl)):
+                self.misses += 1
+                if self.offline:
+                    raise CacheMiss(key)
+                return False, None
+            self.hits += 1
+            self.connection.execute('UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+            self.connection.commit()
+        return True, json.loads(row[0])
+
+    def set(self, method: str, params: dict, response) -> None:
+        """ Сохранить ответ и удалить самые давно использованные ответы сверх max_entries """
+        key = self.make_key(method, params)
+        now = time.time()
+        with self.lock:
+            self.connection.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                                    (key, self.make_request(method, params), method,
+                                     json.dumps(response, ensure_ascii=False), now, now))
+            self.connection.execute(
+                'DELETE FROM responses WHERE key IN ('
+                'SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+            self.connection.commit()
+
+    def clear(self) -> None:
+        """ Удалить все ответы """
+        with self.lock:
+            self.connection.execute('DELETE FROM responses')
+            self.connection.commit()
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.connection.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def stats(self) -> dict:
+        """ Число попаданий и промахов """
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self)}
+
+    def close(self) -> None:
+        self.connection.close()
@@ -6,6 +6,7 @@ import plotly.graph_objs as go
 from typing import List, Tuple
 from api import messages_get_history
 from api import get_friends
+from api import use_cache
 from api_models import Message
 import config
 
@@ -44,6 +45,7 @@ def plotly_messages_freq(dates: List[datetime.date], freq: List[int]) -> None:
 
 
 if __name__ == '__main__':
+    use_cache()
     messages = messages_get_history(172030641, offset=0, count=200)
     x, y = count_dates_from_messages(messages)
     plotly_messages_freq(x, y)
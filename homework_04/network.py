@@ -1,31 +1,62 @@
 import igraph
-import time
-from api import get_friends
+import numpy as np
+from scipy.sparse import csr_matrix
+from api import get_friends, get_friends_many, use_cache
 from igraph import Graph, plot
 import config
 
 
-def get_network(users_ids, as_edgelist=True) -> list:
-    graph = []
-    matrix = [[0 for i in range(len(users_ids))] for j in range(len(users_ids))]
+def build_graph(users_ids: list, friends: dict, output='edgelist'):
+    """ Построить граф дружбы между пользователями
+    :param users_ids: идентификаторы пользователей, вершина i - пользователь users_ids[i]
+    :param friends: словарь идентификатор -> список друзей
+    :param output: 'edgelist' - список ребер (i, j), i < j; 'matrix' - матрица смежности
+                   в виде списка списков; 'sparse' - разреженная матрица scipy; 'igraph' - граф igraph
+    """
+    if output not in ('edgelist', 'matrix', 'sparse', 'igraph'):
+        raise ValueError('Unknown output: {}'.format(output))
+    n = len(users_ids)
+    index = {user_id: i for i, user_id in enumerate(users_ids)}
+    # Ребро (i, j), i < j, хранится числом i * n + j. Ребро есть, если хотя бы
+    # один из двух пользователей есть в списке друзей другого
+    keys = set()
+    for user_id, friends_list in friends.items():
+        user1 = index.get(user_id)
+        if user1 is None:
+            continue
+        for user2 in [index[friend] for friend in friends_list if friend in index]:
+            if user1 < user2:
+                keys.add(user1 * n + user2)
+            elif user2 < user1:
+                keys.add(user2 * n + user1)
 
-    for user1 in range(len(users_ids)):
-        response = get_friends(users_ids[user1])
-        friends_list = response
-        for user2 in range(user1 + 1, len(users_ids)):
-            if users_ids[user2] in friends_list:
-                if as_edgelist:
-                    graph.append((user1, user2))
-                else:
-                    matrix[user1][user2] = 1
-                    matrix[user2][user1] = 1
-        time.sleep(0.4)
-        print("loading...")
+    if output == 'sparse':
+        keys = np.fromiter(keys, dtype=np.int64, count=len(keys))
+        rows, cols = np.concatenate([keys // n, keys % n]), np.concatenate([keys % n, keys // n])
+        return csr_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)), shape=(n, n))
+    edges = [divmod(key, n) for key in sorted(keys)]
 
-    if as_edgelist:
-        return graph
-    else:
-        return matrix
+    if output == 'edgelist':
+        return edges
+    if output == 'igraph':
+        return Graph(n=n, edges=edges, directed=False)
+    matrix = [[0] * n for _ in range(n)]
+    for user1, user2 in edges:
+        matrix[user1][user2] = 1
+        matrix[user2][user1] = 1
+    return matrix
+
+
+def get_network(users_ids, as_edgelist=True, output=None):
+    """ Построить граф дружбы между пользователями, загрузив их списки друзей
+    :param users_ids: идентификаторы пользователей
+    :param as_edgelist: вернуть список ребер (True) или матрицу смежности (False)
+    :param output: формат результата, см. build_graph (если задан, as_edgelist не учитывается)
+    """
+    users_ids = list(users_ids)
+    if output is None:
+        output = 'edgelist' if as_edgelist else 'matrix'
+    return build_graph(users_ids, get_friends_many(users_ids), output)
 
 
 def plot_graph(graph):
@@ -64,6 +95,7 @@ def plot_graph(graph):
 
 
 if __name__ == '__main__':
+    use_cache()
     user_id = config.VK_CONFIG['user_id']
     response = get_friends(user_id)
     graph = get_network(response, as_edgelist=True)
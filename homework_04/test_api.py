@@ -1,16 +1,49 @@
 import unittest
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 import requests
 import time
 
-from api import get
+from api import RateLimiter, VKAPIError, VKClient, get, get_friends_many
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_no_more_than_rate_requests_in_any_second(self):
+        clock = [100.0]
+
+        def sleep(seconds):
+            clock[0] += seconds
+
+        limiter = RateLimiter(rate=3)
+        times = []
+        with patch('time.monotonic', side_effect=lambda: clock[0]), patch('time.sleep', side_effect=sleep):
+            for _ in range(10):
+                limiter.acquire()
+                times.append(clock[0])
+        self.assertEqual([100, 100, 100, 101], times[:4])
+        for first, fourth in zip(times, times[3:]):
+            self.assertGreaterEqual(fourth - first, 1)
+
+    def test_capacity_one_spaces_requests_evenly(self):
+        clock = [0.0]
+
+        def sleep(seconds):
+            clock[0] += seconds
+
+        limiter = RateLimiter(rate=4, capacity=1)
+        times = []
+        with patch('time.monotonic', side_effect=lambda: clock[0]), patch('time.sleep', side_effect=sleep):
+            for _ in range(5):
+                limiter.acquire()
+                times.append(clock[0])
+        self.assertEqual([0, 0.25, 0.5, 0.75, 1], times)
 
 
 class TestGetRequest(unittest.TestCase):
 
     def test_max_retries(self):
-        with patch('requests.get', side_effect=requests.exceptions.RequestException) as requests_get:
-            with self.assertRaises(requests.exceptions.RequestException):
+        with patch('requests.Session.get', side_effect=requests.exceptions.ConnectionError) as requests_get:
+            with self.assertRaises(requests.exceptions.ConnectionError):
                 get('http://example.com', max_retries=3, backoff_factor=0)
         self.assertEqual(requests_get.call_count, 3)
 
@@ -20,8 +53,8 @@ class TestGetRequest(unittest.TestCase):
         total_delay = sum([backoff_factor * (2 ** n) for n in range(max_retries - 1)])
 
         start_time = time.time()
-        with patch('requests.get', side_effect=requests.exceptions.RequestException) as requests_get:
-            with self.assertRaises(requests.exceptions.RequestException):
+        with patch('requests.Session.get', side_effect=requests.exceptions.ConnectionError) as requests_get:
+            with self.assertRaises(requests.exceptions.ConnectionError):
                 get('http://example.com', max_retries=max_retries, backoff_factor=backoff_factor)
         end_time = time.time()
         time_diff = end_time - start_time
@@ -30,16 +63,68 @@ class TestGetRequest(unittest.TestCase):
         self.assertEqual(requests_get.call_count, max_retries)
 
     def test_raises_on_timeout_error(self):
-        with patch('requests.get', side_effect=requests.exceptions.ReadTimeout):
+        with patch('requests.Session.get', side_effect=requests.exceptions.ReadTimeout):
             with self.assertRaises(requests.exceptions.ReadTimeout):
                 get('http://example.com', max_retries=1)
 
     def test_raises_on_http_error(self):
-        with patch('requests.get', side_effect=requests.exceptions.HTTPError):
+        with patch('requests.Session.get', side_effect=requests.exceptions.HTTPError):
             with self.assertRaises(requests.exceptions.HTTPError):
                 get('http://example.com', max_retries=1)
 
     def test_raises_on_server_internal_error(self):
-        with patch('requests.get', side_effect=requests.exceptions.ConnectionError):
+        with patch('requests.Session.get', side_effect=requests.exceptions.ConnectionError):
             with self.assertRaises(requests.exceptions.ConnectionError):
-                get('http://example.com', max_retries=1)
\ No newline at end of file
+                get('http://example.com', max_retries=1)
+
+    def test_does_not_retry_non_retryable_error(self):
+        with patch('requests.Session.get', side_effect=requests.exceptions.InvalidURL) as requests_get:
+            with self.assertRaises(requests.exceptions.InvalidURL):
+                get('http://example.com', max_retries=3, backoff_factor=0)
+        self.assertEqual(requests_get.call_count, 1)
+
+    def test_retries_vk_rate_limit_error(self):
+        too_many = {'error': {'error_code': 6, 'error_msg': 'Too many requests per second'}}
+        ok = {'response': {'count': 1, 'items': [42]}}
+        responses = [Mock(status_code=200, json=Mock(return_value=too_many)),
+                     Mock(status_code=200, json=Mock(return_value=ok))]
+        client = VKClient(backoff_factor=0)
+        with patch('requests.Session.get', side_effect=responses) as requests_get:
+            self.assertEqual(client.call('friends.get', user_id=1), ok['response'])
+        self.assertEqual(requests_get.call_count, 2)
+
+    def test_raises_vk_api_error(self):
+        denied = {'error': {'error_code': 15, 'error_msg': 'Access denied'}}
+        client = VKClient(backoff_factor=0)
+        with patch('requests.Session.get', return_value=Mock(status_code=200, json=Mock(return_value=denied))) as requests_get:
+            with self.assertRaises(VKAPIError):
+                client.call('friends.get', user_id=1)
+        self.assertEqual(requests_get.call_count, 1)
+
+    def test_get_friends_many_batches_calls(self):
+        user_ids = list(range(1, 31))
+
+        def execute(url, params, timeout):
+            code = params['code']
+            ids = [int(call.split('"user_id": ')[1].split(',')[0]) for call in code.split('API.friends.get')[1:]]
+            # Пользователь 7 закрыл профиль, а для 8 и 9 первый вызов упирается в ограничение частоты
+            response, execute_errors = [], []
+            for user_id in ids:
+                if user_id == 7 or (user_id in (8, 9) and len(ids) > 2):
+                    code, message = (30, 'This profile is private') if user_id == 7 else (6, 'Too many requests')
+                    response.append(False)
+                    execute_errors.append({'method': 'friends.get', 'error_code': code, 'error_msg': message})
+                else:
+                    response.append({'count': 1, 'items': [user_id * 10]})
+            return Mock(status_code=200, json=Mock(return_value={'response': response, 'execute_errors': execute_errors}))
+
+        errors = {}
+        with patch('requests.Session.get', side_effect=execute) as requests_get, patch('api.client.backoff'):
+            friends = get_friends_many(user_ids, errors=errors)
+        self.assertEqual(requests_get.call_count, 3)
+        self.assertNotIn(7, friends)
+        self.assertEqual(len(friends), 29)
+        self.assertEqual(friends[30], [300])
+        self.assertEqual(friends[9], [90])
+        self.assertEqual([7], list(errors))
+        self.assertEqual(30, errors[7].code)
@@ -0,0 +1,121 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from api import VKAPIError
+from api_async import AsyncRateLimiter, AsyncVKClient
+from api_cache import ResponseCache
+
+
+class FakeVK:
+    """ Сервер, который отвечает на запросы как VK API """
+
+    def __init__(self, messages_count: int) -> None:
+        self.messages = [{'id': i, 'date': i, 'out': 0} for i in range(messages_count)]
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self.rate_limited = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        method = request.match_info['method']
+        params = request.query
+        if method == 'friends.get':
+            if params['user_id'] == '2':
+                return web.json_response({'error': {'error_code': 30, 'error_msg': 'This profile is private'}})
+            if params['user_id'] == '3' and not self.rate_limited:
+                self.rate_limited += 1
+                return web.json_response({'error': {'error_code': 6, 'error_msg': 'Too many requests per second'}})
+            return web.json_response({'response': {'count': 2, 'items': [10, 20]}})
+
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.05)
+        self.active -= 1
+        offset, count = int(params['offset']), int(params['count'])
+        items = self.messages[offset:offset + count]
+        return web.json_response({'response': {'count': len(self.messages), 'items': items}})
+
+
+class TestAsyncClient(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.vk = FakeVK(messages_count=1050)
+        app = web.Application()
+        app.router.add_get('/method/{method}', self.vk.handle)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.client = AsyncVKClient(access_token='token', domain=str(self.server.make_url('/method')),
+                                    backoff_factor=0, rate=100, window=3)
+        await self.client.__aenter__()
+
+    async def asyncTearDown(self):
+        await self.client.__aexit__(None, None, None)
+        await self.server.close()
+
+    async def test_get_friends(self):
+        self.assertEqual([10, 20], await self.client.get_friends(1))
+
+    async def test_get_friends_raises_vk_error(self):
+        with self.assertRaises(VKAPIError):
+            await self.client.get_friends(2)
+
+    async def test_get_friends_retries_rate_limit_error(self):
+        self.assertEqual([10, 20], await self.client.get_friends(3))
+        self.assertEqual(2, self.vk.requests)
+
+    async def test_repeated_call_uses_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.client.cache = ResponseCache(os.path.join(directory, 'cache.sqlite'))
+            self.assertEqual([10, 20], await self.client.get_friends(1))
+            self.assertEqual([10, 20], await self.client.get_friends(1))
+            self.assertEqual(1, self.vk.requests)
+            self.assertEqual({'hits': 1, 'misses': 1, 'entries': 1}, self.client.cache.stats())
+            self.client.cache.close()
+
+    async def test_history_is_streamed_in_order(self):
+        messages = [message['id'] async for message in self.client.messages_get_history(1)]
+        self.assertEqual(list(range(1050)), messages)
+        self.assertEqual(6, self.vk.requests)
+        self.assertEqual(3, self.vk.max_active)
+
+    async def test_history_with_offset_and_count(self):
+        messages = [message['id'] async for message in self.client.messages_get_history(1, offset=100, count=450)]
+        self.assertEqual(list(range(100, 550)), messages)
+
+    async def test_stopped_history_leaves_no_pending_pages(self):
+        tasks = []
+        ensure_future = asyncio.ensure_future
+
+        def record(coro):
+            task = ensure_future(coro)
+            tasks.append(task)
+            return task
+
+        with patch('asyncio.ensure_future', side_effect=record):
+            history = self.client.messages_get_history(1)
+            async for message in history:
+                if message['id'] == 250:
+                    break
+            await history.aclose()
+        self.assertTrue(tasks)
+        self.assertTrue(all(task.done() for task in tasks))
+
+
+class TestAsyncRateLimiter(unittest.IsolatedAsyncioTestCase):
+
+    async def test_no_more_than_capacity_requests_in_any_period(self):
+        limiter = AsyncRateLimiter(rate=20, capacity=2)
+        times = []
+        for _ in range(8):
+            await limiter.acquire()
+            times.append(time.monotonic())
+        for first, third in zip(times, times[2:]):
+            self.assertGreaterEqual(third - first, 0.1)
@@ -0,0 +1,112 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from api import VKClient
+from api_cache import CacheMiss, ResponseCache
+
+
+def vk_response(response):
+    return Mock(status_code=200, json=Mock(return_value={'response': response}))
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache.sqlite')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_repeated_call_uses_cache(self):
+        cache = ResponseCache(self.path)
+        client = VKClient(access_token='token', cache=cache)
+        with patch('requests.Session.get', return_value=vk_response({'count': 1, 'items': [42]})) as requests_get:
+            first = client.call('friends.get', user_id=1, fields='')
+            second = client.call('friends.get', fields='', user_id=1)
+        self.assertEqual(first, second)
+        self.assertEqual(requests_get.call_count, 1)
+        self.assertEqual({'hits': 1, 'misses': 1, 'entries': 1}, cache.stats())
+        cache.close()
+
+    def test_execute_with_failed_calls_is_not_cached(self):
+        cache = ResponseCache(self.path)
+        client = VKClient(access_token='token', cache=cache)
+        failed = Mock(status_code=200, json=Mock(return_value={
+            'response': [{'count': 0, 'items': []}, False],
+            'execute_errors': [{'method': 'friends.get', 'error_code': 6, 'error_msg': 'Too many requests per second'}]}))
+        with patch('requests.Session.get', return_value=failed) as requests_get:
+            client.call('execute', code='return [];')
+            client.call('execute', code='return [];')
+        self.assertEqual(requests_get.call_count, 2)
+        self.assertEqual(0, len(cache))
+        with patch('requests.Session.get', return_value=vk_response([{'count': 0, 'items': []}])) as requests_get:
+            client.call('execute', code='return [];')
+            client.call('execute', code='return [];')
+        self.assertEqual(requests_get.call_count, 1)
+        cache.close()
+
+    def test_token_is_hashed_into_the_key(self):
+        self.assertEqual(ResponseCache.make_key('friends.get', {'user_id': 1, 'access_token': 'a'}),
+                         ResponseCache.make_key('friends.get', {'user_id': '1', 'access_token': 'a'}))
+        self.assertNotEqual(ResponseCache.make_key('friends.get', {'user_id': 1, 'access_token': 'a'}),
+                            ResponseCache.make_key('friends.get', {'user_id': 1, 'access_token': 'b'}))
+        self.assertNotIn('secret', ResponseCache.make_key('friends.get', {'access_token': 'secret'}))
+
+    def test_responses_are_not_shared_between_tokens(self):
+        cache = ResponseCache(self.path)
+        with patch('requests.Session.get', return_value=vk_response({'count': 1, 'items': [1]})):
+            VKClient(access_token='first', cache=cache).call('messages.getHistory', user_id=1)
+        with patch('requests.Session.get', return_value=vk_response({'count': 1, 'items': [2]})) as requests_get:
+            response = VKClient(access_token='second', cache=cache).call('messages.getHistory', user_id=1)
+        self.assertEqual({'count': 1, 'items': [2]}, response)
+        self.assertEqual(requests_get.call_count, 1)
+        cache.close()
+
+    def test_expired_response_is_downloaded_again(self):
+        cache = ResponseCache(self.path, ttls={'friends.get': -1})
+        client = VKClient(access_token='token', cache=cache)
+        with patch('requests.Session.get', return_value=vk_response({'count': 0, 'items': []})) as requests_get:
+            client.call('friends.get', user_id=1)
+            client.call('friends.get', user_id=1)
+        self.assertEqual(requests_get.call_count, 2)
+        cache.close()
+
+    def test_least_recently_used_responses_are_evicted(self):
+        cache = ResponseCache(self.path, max_entries=2)
+        cache.set('friends.get', {'user_id': 1}, [1])
+        cache.set('friends.get', {'user_id': 2}, [2])
+        cache.get('friends.get', {'user_id': 1})
+        cache.set('friends.get', {'user_id': 3}, [3])
+        self.assertEqual(2, len(cache))
+        self.assertEqual((True, [1]), cache.get('friends.get', {'user_id': 1}))
+        self.assertEqual((False, None), cache.get('friends.get', {'user_id': 2}))
+        cache.close()
+
+    def test_offline_mode_replays_recorded_responses(self):
+        recorder = ResponseCache(self.path)
+        with patch('requests.Session.get', return_value=vk_response({'count': 1, 'items': [42]})):
+            VKClient(access_token='token', cache=recorder).call('friends.get', user_id=1)
+        recorder.close()
+
+        replay = ResponseCache(self.path, offline=True)
+        with patch('requests.Session.get') as requests_get:
+            self.assertEqual({'count': 1, 'items': [42]},
+                             VKClient(access_token='token', cache=replay).call('friends.get', user_id=1))
+            with self.assertRaises(CacheMiss):
+                VKClient(access_token='token', cache=replay).call('friends.get', user_id=2)
+            with self.assertRaises(CacheMiss):
+                VKClient(access_token='other token', cache=replay).call('friends.get', user_id=1)
+        replay.close()
+
+        any_token = ResponseCache(self.path, offline=True, any_token=True)
+        with patch('requests.Session.get') as other_get:
+            self.assertEqual({'count': 1, 'items': [42]},
+                             VKClient(access_token='other token', cache=any_token).call('friends.get', user_id=1))
+        self.assertEqual(requests_get.call_count + other_get.call_count, 0)
+        with self.assertRaises(ValueError):
+            ResponseCache(self.path, any_token=True)
+        any_token.close()
+        replay.close()
@@ -0,0 +1,47 @@
+import random
+import unittest
+from unittest.mock import patch
+
+from network import build_graph, get_network
+
+
+class TestNetwork(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(1)
+        self.users_ids = random.sample(range(1, 10 ** 6), 60)
+        self.friends = {user_id: [] for user_id in self.users_ids}
+        for user1 in self.users_ids:
+            for user2 in self.users_ids:
+                if user1 < user2 and random.random() < 0.2:
+                    self.friends[user1].append(user2)
+                    self.friends[user2].append(user1)
+        for user_id in self.users_ids:
+            self.friends[user_id] += random.sample(range(10 ** 6, 2 * 10 ** 6), 20)
+
+    def naive_edges(self):
+        edges = []
+        for user1 in range(len(self.users_ids)):
+            for user2 in range(user1 + 1, len(self.users_ids)):
+                if self.users_ids[user2] in self.friends[self.users_ids[user1]]:
+                    edges.append((user1, user2))
+        return edges
+
+    def test_edgelist(self):
+        self.assertEqual(self.naive_edges(), build_graph(self.users_ids, self.friends))
+
+    def test_outputs_agree(self):
+        edges = self.naive_edges()
+        matrix = build_graph(self.users_ids, self.friends, 'matrix')
+        sparse = build_graph(self.users_ids, self.friends, 'sparse')
+        graph = build_graph(self.users_ids, self.friends, 'igraph')
+        self.assertEqual(matrix, sparse.toarray().tolist())
+        self.assertEqual(2 * len(edges), sum(map(sum, matrix)))
+        self.assertEqual(sorted(edges), sorted(edge.tuple for edge in graph.es))
+        self.assertEqual(len(self.users_ids), graph.vcount())
+
+    def test_closed_profile_keeps_edges_of_friends(self):
+        edges = self.naive_edges()
+        del self.friends[self.users_ids[0]]
+        with patch('network.get_friends_many', return_value=self.friends):
+            self.assertEqual(edges, get_network(self.users_ids))